@@ -11,17 +11,15 @@ This module provides the wrapper function for running the ichorCurate app.
 # Import packages
 import streamlit as st
 
-# Import user modules
-from subpages.curation import display as curation_display
-from subpages.tracker_dashboard import display as tracker_dashboard_display
-from subpages.login import display as login_display
-from subpages.backend_selection import display as backend_selection_display
-from subpages.projects_overview import display as projects_overview_display
-from src.utils import *
+# Import user modules (each page is imported when it is first displayed, so the login page does not wait for the others)
+from src.utils import load_backend_path, get_backend_database, migrate_backend_to_sqlite, start_rerun_timing, display_performance_panel
 
 # Setting page formats
 st.set_page_config(layout="wide")
 
+# Time this rerun, for the performance panel and metrics file
+start_rerun_timing()
+
 # Title of the app
 st.title('ichorCurate')
 
@@ -35,14 +33,17 @@ if "logged_in" not in st.session_state:
 
 # Redirect the user to the login page if they are not logged in
 if not st.session_state.logged_in:
+    from subpages.login import display as login_display
     login_display()
 
 # Redirect the user to the backend selection page if the backend path is not set
 elif ("backend" not in st.session_state or st.session_state.backend is None):
+    from subpages.backend_selection import display as backend_selection_display
     backend_selection_display()
 
 # Redirect the user to the projects overview page if they are logged in and have not selected a project
 elif ("selected_project" not in st.session_state or st.session_state.selected_project is None) and st.session_state.logged_in == True:
+    from subpages.projects_overview import display as projects_overview_display
     projects_overview_display()
 
     # New backend button
@@ -51,6 +52,23 @@ elif ("selected_project" not in st.session_state or st.session_state.selected_pr
         st.rerun()
     st.sidebar.write(f"Connected to {st.session_state.backend}.")
 
+    # Optionally move the backend metadata from YAML/TSV files to an SQLite database
+    if get_backend_database(st.session_state.backend) is None:
+        # Migrating changes the storage for every user of the backend and cannot be undone from the app, so ask for confirmation first
+        if st.sidebar.button("Migrate Backend to SQLite", help="Store projects and curations in an SQLite database in the backend folder. All app instances using this backend must run on the same host."):
+            st.session_state["migrate_confirm"] = True
+        if st.session_state.get("migrate_confirm"):
+            st.sidebar.warning("This moves the projects and curations of every user of this backend to SQLite, and cannot be undone from the app.")
+            if st.sidebar.button("Confirm Migration"):
+                del st.session_state["migrate_confirm"]
+                migrate_backend_to_sqlite(st.session_state.backend)
+                st.rerun()
+            if st.sidebar.button("Cancel Migration"):
+                del st.session_state["migrate_confirm"]
+                st.rerun()
+    else:
+        st.sidebar.write("Backend stored in SQLite.")
+
 else:
     # Initialize curated solutions in session state if it doesn't exist
     if "curated_solutions" not in st.session_state[st.session_state.selected_project]: 
@@ -87,6 +105,7 @@ else:
 
     # Display the page
     if st.session_state.page == "Tracker Dashboard" and st.session_state.logged_in == True:
+        from subpages.tracker_dashboard import display as tracker_dashboard_display
         tracker_dashboard_display()
     elif st.session_state.page == "Curation" and st.session_state.logged_in == True:
         # Allow users to navigate back without curation
@@ -94,4 +113,8 @@ else:
             st.session_state.page = "Tracker Dashboard"
             st.rerun()
 
-        curation_display()
\ No newline at end of file
+        from subpages.curation import display as curation_display
+        curation_display()
+
+# Show where the time of this rerun went, if requested
+display_performance_panel()
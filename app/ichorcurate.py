@@ -0,0 +1,161 @@
+"""
+ichorcurate.py
+v1.0.0, 3/14/2025
+Branch: external
+Author: Alexander Netzley, anetzley@fredhutch.org
+Ha Lab, Fred Hutchinson Cancer Research Center
+
+This module provides a command-line interface to export the solutions and curation summary of an ichorCurate
+project without the Streamlit app, e.g. as a batch job on a compute node:
+
+    python app/ichorcurate.py export-all --backend /path/to/backend --project my_project --workers 16
+    python app/ichorcurate.py export-curated --backend /path/to/backend --project my_project --dry-run
+    python app/ichorcurate.py export-all --backend /path/to/backend --project my_project --verify
+    python app/ichorcurate.py summary --backend /path/to/backend --project my_project
+    python app/ichorcurate.py archive --backend /path/to/backend --project my_project --format tar.gz
+    python app/ichorcurate.py params --backend /path/to/backend --project my_project
+"""
+
+# Import packages
+import argparse
+import os
+import sys
+
+# Import user modules
+from src.utils import load_config, replay_curations, get_folders, format_filepath, generate_output_folders, get_export_jobs, get_solution_export_plan, export_all, export_archive, count_export_strategies, populate_summary, generate_summary_file, load_sample_index, get_sample_entry, load_params_store, CURATION_SUMMARY_NAME, PARAMS_STORE_NAME, PARAMS_TABLE_WORKERS, EXPORT_STRATEGIES, EXPORT_STRATEGY, EXPORT_WORKERS, ARCHIVE_FORMATS
+
+# Function to look up a project in the backend config, returning its data path, output path and curations
+def load_project(backend, project, output_path=None, require_output=True):
+    projects = load_config(os.path.join(backend, "config.yaml")).get("projects") or {}
+    if project not in projects:
+        raise SystemExit(f"Error: project '{project}' not found in backend {backend} (available: {', '.join(projects) or 'none'})")
+
+    project_info = projects[project]
+    data_path = format_filepath(project_info["data_path"])
+    output_path = output_path or project_info.get("output_path")
+    if not output_path and require_output:
+        raise SystemExit(f"Error: project '{project}' has no output path, pass one with --output")
+    return data_path, output_path, replay_curations(project_info["summary_path"])
+
+# Function to export the optimal or curated solution of every sample in a project
+def run_export(args, curated_only):
+    data_path, output_path, curated_solutions = load_project(args.backend, args.project, args.output)
+    sample_folders = get_folders(data_path)
+
+    if args.dry_run:
+        export_jobs = get_export_jobs(sample_folders, curated_solutions, curated_only)
+        for sample, solution in export_jobs.items():
+            export_plan, _ = get_solution_export_plan(sample, data_path, solution)
+            total_bytes = sum(os.path.getsize(src) for src in export_plan.values())
+            print(f"{sample}\t{solution}\t{len(export_plan)} files\t{total_bytes / 1024 ** 2:.1f} MiB")
+        print(f"Would export {len(export_jobs)} samples to {os.path.join(output_path, args.project)}")
+        return 0
+
+    generate_output_folders(output_path, args.project)
+    export_results = export_all(sample_folders, curated_solutions, data_path, output_path, args.project, curated_only=curated_only, max_workers=args.workers, strategy=args.strategy, verify=args.verify)
+
+    failed = 0
+    for sample, result in export_results.items():
+        if result["error"]:
+            failed += 1
+            print(f"{sample}\tfailed: {result['error']}", file=sys.stderr)
+        elif result.get("verification") and (result["verification"]["mismatched"] or result["verification"]["missing"]):
+            failed += 1
+            verification = result["verification"]
+            print(f"{sample}\tverification failed: {len(verification['mismatched'])} mismatched, {len(verification['missing'])} missing ({', '.join(verification['mismatched'] + verification['missing'])})", file=sys.stderr)
+        else:
+            print(f"{sample}\t{count_export_strategies(result['files']) or 'nothing to export'}")
+    print(f"{len(export_results) - failed} of {len(export_results)} solutions exported to {os.path.join(output_path, args.project)}")
+    return 1 if failed else 0
+
+# Function to export the selected solution of every sample, the summary and an index into a single archive
+def run_archive(args):
+    data_path, output_path, curated_solutions = load_project(args.backend, args.project, args.output)
+    sample_folders = get_folders(data_path)
+
+    if args.dry_run:
+        export_jobs = get_export_jobs(sample_folders, curated_solutions, args.curated_only)
+        print(f"Would archive {len(export_jobs)} samples to {os.path.join(output_path, f'{args.project}.{args.format}')}")
+        return 0
+
+    archive_path, export_results = export_archive(sample_folders, curated_solutions, data_path, output_path, args.project, args.format, args.curated_only, args.workers)
+    failed = {sample: result["error"] for sample, result in export_results.items() if result["error"]}
+    for sample, error in failed.items():
+        print(f"{sample}\tfailed: {error}", file=sys.stderr)
+    print(f"{len(export_results) - len(failed)} of {len(export_results)} solutions ({sum(result['archived'] for result in export_results.values())} files) archived to {archive_path}")
+    return 1 if failed else 0
+
+# Function to write the curation summary of a project
+def run_summary(args):
+    data_path, output_path, curated_solutions = load_project(args.backend, args.project, args.output)
+    summary = populate_summary(get_folders(data_path), data_path, curated_solutions)
+
+    if args.dry_run:
+        for line in summary:
+            print(line)
+        return 0
+
+    generate_output_folders(output_path, args.project)
+    generate_summary_file(summary, output_path, args.project)
+    print(f"Summary file generated at {os.path.join(output_path, args.project, CURATION_SUMMARY_NAME)}")
+    return 0
+
+# Function to refresh the params store of a project, one row per (sample, solution) in the backend folder
+def run_params(args):
+    data_path, _, _ = load_project(args.backend, args.project, require_output=False)
+    store_path = os.path.join(args.backend, args.project, PARAMS_STORE_NAME)
+
+    if args.dry_run:
+        samples = load_sample_index(data_path)["samples"]
+        solutions = sum(1 for sample in samples for solution in get_sample_entry(data_path, sample)["solutions"] if solution["params_file"])
+        print(f"Would store the params of {solutions} solutions of {len(samples)} samples in {store_path}")
+        return 0
+
+    params_store = load_params_store(data_path, os.path.join(args.backend, args.project), args.workers)
+    print(f"Stored the params of {params_store.num_rows} solutions of {len(set(params_store.column('sample').to_pylist()))} samples in {store_path}")
+    return 0
+
+# Function to build the argument parser, with the options shared by every subcommand
+def build_parser():
+    parser = argparse.ArgumentParser(prog="ichorcurate", description="Export ichorCurate projects without the Streamlit app.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--backend", required=True, help="backend folder containing config.yaml")
+    common.add_argument("--project", required=True, help="name of the project in the backend")
+    common.add_argument("--dry-run", action="store_true", help="report what would be written without writing anything")
+
+    # The params subcommand writes to the backend folder, so only the others take an output path
+    output = argparse.ArgumentParser(add_help=False)
+    output.add_argument("--output", help="output path to export to (default: the project's output path)")
+
+    for command, help_text in (("export-all", "export the curated solution of every sample, or the optimal one if it is not curated"),
+                               ("export-curated", "export the curated solution of every curated sample")):
+        export_parser = subparsers.add_parser(command, parents=[common, output], help=help_text)
+        export_parser.add_argument("--workers", type=int, default=EXPORT_WORKERS, help=f"number of samples exported concurrently (default: {EXPORT_WORKERS})")
+        export_parser.add_argument("--strategy", choices=EXPORT_STRATEGIES, default=EXPORT_STRATEGY, help=f"how files are written to the output path (default: {EXPORT_STRATEGY})")
+        export_parser.add_argument("--verify", action="store_true", help="compare the checksums of the exported files with the ichorCNA output and write a checksums.sha256 per sample")
+
+    subparsers.add_parser("summary", parents=[common, output], help=f"write the curation summary ({CURATION_SUMMARY_NAME}) of the project")
+
+    archive_parser = subparsers.add_parser("archive", parents=[common, output], help="export every sample, the curation summary and an index into a single archive")
+    archive_parser.add_argument("--format", choices=ARCHIVE_FORMATS, default="zip", help="archive format (default: zip)")
+    archive_parser.add_argument("--curated-only", action="store_true", help="only archive curated samples")
+    archive_parser.add_argument("--workers", type=int, default=EXPORT_WORKERS, help=f"number of sample folders walked concurrently (default: {EXPORT_WORKERS})")
+
+    params_parser = subparsers.add_parser("params", parents=[common], help=f"refresh the params of every solution in the backend folder ({PARAMS_STORE_NAME}), for cohort analyses")
+    params_parser.add_argument("--workers", type=int, default=PARAMS_TABLE_WORKERS, help=f"number of params files read concurrently (default: {PARAMS_TABLE_WORKERS})")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "summary":
+        return run_summary(args)
+    if args.command == "archive":
+        return run_archive(args)
+    if args.command == "params":
+        return run_params(args)
+    return run_export(args, curated_only=args.command == "export-curated")
+
+if __name__ == "__main__":
+    sys.exit(main())
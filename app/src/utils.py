@@ -8,16 +8,200 @@ Ha Lab, Fred Hutchinson Cancer Research Center
 This module provides helper functions for the ichorCurate app.
 """
 # Import packages
-import fitz  # PyMuPDF
-from PIL import Image
+# PyMuPDF (fitz), PIL and pandas are imported by the functions that use them, so pages and tools that never
+# render a PDF or build a table (login, backend selection, the CLI summary) start without loading them
 import re
 import streamlit as st
 import os
 import shutil
-import math
 import datetime
+import time
 import yaml
 import stat
+import hashlib
+import tempfile
+import json
+import uuid
+import sqlite3
+import io
+import tarfile
+import zipfile
+from contextlib import contextmanager
+import threading
+import functools
+import logging
+import logging.handlers
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+import multiprocessing
+try:
+    import fcntl  # Not available on Windows
+except ImportError:
+    fcntl = None
+try:
+    from watchdog.observers import Observer
+    from watchdog.observers.polling import PollingObserver
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = PollingObserver = None
+    FileSystemEventHandler = object
+
+###########################
+### Performance Metrics ###
+###########################
+# Hot helpers and page displays are wrapped in timing spans. Each span is recorded three ways: in the current
+# rerun (per script thread), in the session's history (shown by the sidebar performance panel), and in a
+# process-wide window that is summarized (count, p50, p95, max) into a rotating metrics file once a minute.
+# Span times are inclusive, so a span that calls other timed helpers also counts their time.
+METRICS_FILE = os.environ.get("ICHORCURATE_METRICS_FILE", os.path.join(tempfile.gettempdir(), "ichorCurate_metrics.log"))  # Empty to disable
+METRICS_FILE_BYTES = 5 * 1024 * 1024
+METRICS_FILE_BACKUPS = 3
+METRICS_FLUSH_SECONDS = 60
+METRICS_SAMPLE_CAP = 1000  # Durations kept per span, per session and per flush window
+
+_timing_local = threading.local()
+_metrics_window = {}  # span name -> {"count", "max", "durations"}
+_metrics_window_start = time.time()
+_metrics_lock = threading.Lock()
+_metrics_logger = None
+
+# Function to record the duration of a span
+def _record_span(name, duration):
+    rerun = getattr(_timing_local, "rerun", None)
+    if rerun is not None:
+        rerun["spans"].append((name, duration))
+        rerun["end"] = time.perf_counter()
+    with _metrics_lock:
+        window = _metrics_window.setdefault(name, {"count": 0, "max": 0.0, "durations": []})
+        window["count"] += 1
+        window["max"] = max(window["max"], duration)
+        if len(window["durations"]) < METRICS_SAMPLE_CAP:
+            window["durations"].append(duration)
+
+# Function to time a block of code as a span
+@contextmanager
+def timing_span(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record_span(name, time.perf_counter() - start)
+
+# Function to time every call of a function as a span, named after the function unless a name is given
+def timed(name=None):
+    def decorator(function):
+        span_name = name or function.__name__
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                _record_span(span_name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+# Function to get a percentile of a list of durations (nearest rank)
+def _percentile(durations, q):
+    ordered = sorted(durations)
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))]
+
+# Function to add the spans of a finished rerun to the session's history
+def _add_rerun_to_history(performance, rerun):
+    performance["reruns"] += 1
+    performance["last_rerun"] = {"total": rerun["end"] - rerun["start"], "spans": rerun["spans"]}
+    for name, duration in rerun["spans"]:
+        performance["history"].setdefault(name, deque(maxlen=METRICS_SAMPLE_CAP)).append(duration)
+
+# Function to start recording the spans of this rerun. The rerun is kept in the session, so one that never reached
+# finish_rerun_timing (it exited through st.rerun() or st.stop()) is added to the history when the next one starts,
+# ending at its last span.
+def start_rerun_timing():
+    performance = st.session_state.setdefault("performance", {"history": {}, "reruns": 0})
+    if performance.get("current"):
+        _add_rerun_to_history(performance, performance["current"])
+    start = time.perf_counter()
+    performance["current"] = _timing_local.rerun = {"start": start, "end": start, "spans": []}
+
+# Function to stop recording the spans of this rerun, adding them to the session's history
+def finish_rerun_timing():
+    performance = st.session_state.get("performance")
+    rerun = performance.pop("current", None) if performance else None
+    if rerun is None:
+        return None
+    _timing_local.rerun = None
+
+    rerun["end"] = time.perf_counter()
+    _add_rerun_to_history(performance, rerun)
+    flush_metrics()
+    return performance
+
+# Function to get the logger writing to the rotating metrics file
+def _get_metrics_logger():
+    global _metrics_logger
+    if _metrics_logger is None:
+        logger = logging.getLogger("ichorCurate.metrics")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        if not logger.handlers:
+            handler = logging.handlers.RotatingFileHandler(METRICS_FILE, maxBytes=METRICS_FILE_BYTES, backupCount=METRICS_FILE_BACKUPS)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+        _metrics_logger = logger
+    return _metrics_logger
+
+# Function to write one summary line per span to the metrics file, once the current window is old enough
+def flush_metrics(force=False):
+    global _metrics_window, _metrics_window_start
+    with _metrics_lock:
+        window_seconds = time.time() - _metrics_window_start
+        if not METRICS_FILE or not _metrics_window or (window_seconds < METRICS_FLUSH_SECONDS and not force):
+            return
+        window, _metrics_window = _metrics_window, {}
+        _metrics_window_start = time.time()
+
+    try:
+        logger = _get_metrics_logger()
+        timestamp = datetime.datetime.now().isoformat(timespec="seconds")
+        for name, span in sorted(window.items()):
+            logger.info(json.dumps({
+                "time": timestamp, "pid": os.getpid(), "window_s": round(window_seconds, 1), "span": name, "count": span["count"],
+                "p50_ms": round(_percentile(span["durations"], 50) * 1000, 3),
+                "p95_ms": round(_percentile(span["durations"], 95) * 1000, 3),
+                "max_ms": round(span["max"] * 1000, 3),
+            }))
+    except OSError as e:
+        print(f"Warning: unable to write metrics to {METRICS_FILE}: {e}")
+
+# Function to show where the time of the last rerun and of this session went, in the sidebar
+def display_performance_panel():
+    performance = finish_rerun_timing()
+    if not performance or not st.sidebar.toggle("Show Performance", key="show_performance"):
+        return
+
+    last_rerun = performance["last_rerun"]
+    st.sidebar.write(f"Last rerun: {last_rerun['total'] * 1000:.0f} ms")
+    rerun_totals = {}
+    for name, duration in last_rerun["spans"]:
+        calls, total = rerun_totals.get(name, (0, 0.0))
+        rerun_totals[name] = (calls + 1, total + duration)
+    st.sidebar.dataframe(
+        [{"span": name, "calls": calls, "total ms": round(total * 1000, 1)} for name, (calls, total) in sorted(rerun_totals.items(), key=lambda item: -item[1][1])],
+        hide_index=True, use_container_width=True)
+
+    st.sidebar.write(f"This session ({performance['reruns']} reruns):")
+    st.sidebar.dataframe(
+        [{"span": name, "calls": len(durations), "p50 ms": round(_percentile(durations, 50) * 1000, 1),
+          "p95 ms": round(_percentile(durations, 95) * 1000, 1), "max ms": round(max(durations) * 1000, 1)}
+         for name, durations in sorted(performance["history"].items(), key=lambda item: -sum(item[1]))],
+        hide_index=True, use_container_width=True)
+
+    # The render cache is shared by every session of this app process
+    render_stats = get_render_cache_stats()
+    st.sidebar.write(
+        f"Render cache (this process): {render_stats['memory_hits']} memory hits, {render_stats['disk_hits']} disk hits, "
+        f"{render_stats['misses']} misses; {render_stats['memory_entries']} pages ({render_stats['memory_bytes'] / 1024 ** 2:.0f} MB) in memory, "
+        f"{render_stats['memory_evictions']} memory and {render_stats['disk_evictions']} disk evictions")
 
 ############################
 ### backend_selection.py ###
@@ -68,11 +252,126 @@ def initialize_backend_folder(folder_path):
     with open(config_path, "w") as f:
         yaml.dump(default_config, f, default_flow_style=False)
 
+######################
+### SQLite Backend ###
+######################
+# A backend can optionally keep its projects and curations in an SQLite database (ichorcurate.db) next to its
+# config.yaml. When the database exists, the config/curation helpers below read and write it instead of the
+# YAML/TSV files. The database uses WAL mode, so all app processes sharing it must run on the same host.
+BACKEND_DATABASE_NAME = "ichorcurate.db"
+BACKEND_DATABASE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    name TEXT PRIMARY KEY,
+    data_path TEXT,
+    summary_path TEXT,
+    output_path TEXT,
+    revision INTEGER NOT NULL DEFAULT 0,
+    updated REAL
+);
+CREATE INDEX IF NOT EXISTS projects_summary_path ON projects (summary_path);
+CREATE TABLE IF NOT EXISTS samples (
+    project TEXT NOT NULL,
+    sample TEXT NOT NULL,
+    PRIMARY KEY (project, sample)
+);
+CREATE TABLE IF NOT EXISTS curations (
+    project TEXT NOT NULL,
+    sample TEXT NOT NULL,
+    user TEXT NOT NULL,
+    solution_pdf TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    PRIMARY KEY (project, sample, user)
+);
+CREATE INDEX IF NOT EXISTS curations_project_user ON curations (project, user);
+"""
+
+# Function to get the SQLite database of a backend folder, or None if the backend uses YAML/TSV files
+def get_backend_database(backend_path):
+    database_path = os.path.join(backend_path, BACKEND_DATABASE_NAME)
+    return database_path if os.path.exists(database_path) else None
+
+# Context manager to open a backend database, committing on success
+@contextmanager
+def _connect_backend_database(database_path):
+    connection = sqlite3.connect(database_path, timeout=30)
+    try:
+        with connection:
+            yield connection
+    finally:
+        connection.close()
+
+# Function to create a backend database with its schema
+def _create_backend_database(database_path):
+    with _connect_backend_database(database_path) as connection:
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(BACKEND_DATABASE_SCHEMA)
+
+# Function to find the backend database and project name of a curation summary path
+def _get_summary_project(summary_path):
+    database_path = get_backend_database(os.path.dirname(os.path.dirname(os.path.normpath(summary_path))))
+    if database_path is None:
+        return None, None
+    with _connect_backend_database(database_path) as connection:
+        row = connection.execute("SELECT name FROM projects WHERE summary_path = ?", (summary_path,)).fetchone()
+    return database_path, (row[0] if row else os.path.basename(os.path.dirname(summary_path)))
+
+# Function to mark a project's curations as changed, so sessions know to reload them
+def _bump_project_revision(connection, project):
+    connection.execute("UPDATE projects SET revision = revision + 1, updated = ? WHERE name = ?", (time.time(), project))
+
+# Function to migrate an existing YAML/TSV backend to an SQLite backend; the YAML/TSV files are left in place
+def migrate_backend_to_sqlite(backend_path):
+    database_path = os.path.join(backend_path, BACKEND_DATABASE_NAME)
+    if os.path.exists(database_path):
+        return database_path
+
+    # Build the database under a temporary name, so a failed migration leaves the backend untouched
+    tmp_database_path = f"{database_path}.{uuid.uuid4().hex}.tmp"  # Unique, as another session may be migrating too
+    _create_backend_database(tmp_database_path)
+    config = load_config(os.path.join(backend_path, "config.yaml"))
+    with _connect_backend_database(tmp_database_path) as connection:
+        for project, project_info in (config.get("projects") or {}).items():
+            summary_path = project_info.get("summary_path") or os.path.join(backend_path, project, CURATION_SUMMARY_NAME)
+            latest_update = get_latest_update(summary_path)
+            connection.execute(
+                "INSERT INTO projects (name, data_path, summary_path, output_path, updated) VALUES (?, ?, ?, ?, ?)",
+                (project, project_info.get("data_path"), summary_path, project_info.get("output_path"), latest_update.timestamp() if latest_update else None),
+            )
+
+            # Import every sample listed in the summary, and the curations from the summary and journal
+            if os.path.exists(summary_path):
+                with open(summary_path, "r") as file:
+                    samples = [line.split("\t", 1)[0] for line in file.readlines()[1:] if line.strip()]
+                connection.executemany("INSERT OR IGNORE INTO samples (project, sample) VALUES (?, ?)", [(project, sample) for sample in samples])
+            for sample, users in replay_curations(summary_path).items():
+                connection.execute("INSERT OR IGNORE INTO samples (project, sample) VALUES (?, ?)", (project, sample))
+                connection.executemany(
+                    "INSERT INTO curations (project, sample, user, solution_pdf, timestamp) VALUES (?, ?, ?, ?, ?)",
+                    [(project, sample, user, curation["solution_pdf"], curation["timestamp"]) for user, curation in users.items()],
+                )
+
+    # Link rather than replace, so a database another session migrated first (and curated into since) is kept
+    try:
+        os.link(tmp_database_path, database_path)
+    except FileExistsError:
+        pass
+    except OSError:
+        os.replace(tmp_database_path, database_path)  # The filesystem does not support hard links
+    if os.path.exists(tmp_database_path):
+        os.remove(tmp_database_path)
+    return database_path
+
 ###########################
 ### project_overview.py ###
 ###########################
-# Function to load the YAML config file
+# Function to load the YAML config file (or the projects of an SQLite backend, in the same structure)
 def load_config(config_path):
+    database_path = get_backend_database(os.path.dirname(config_path))
+    if database_path:
+        with _connect_backend_database(database_path) as connection:
+            rows = connection.execute("SELECT name, data_path, summary_path, output_path FROM projects ORDER BY rowid").fetchall()
+        return {"projects": {name: {"data_path": data_path, "summary_path": summary_path, "output_path": output_path} for name, data_path, summary_path, output_path in rows}}
+
     try:
         if not os.path.exists(config_path):
             raise FileNotFoundError(f"Config file not found: {config_path}")
@@ -92,73 +391,319 @@ def load_config(config_path):
         print(f"Unexpected error loading config: {e}")
         return {}  # Catch any other unexpected errors
 
-    
-# Function to count the number of samples (example: count files in data_path)
-def count_samples(data_path):
-    return str(math.floor(len(os.listdir(data_path))/4)) if os.path.exists(data_path) else 0
 
-# Function to count curated samples (assumes curated samples are stored in metadata)
-def count_curated_samples(summary_path):
+# Function to save the projects of the config file (or of the SQLite backend)
+def save_config(config_path, config):
+    database_path = get_backend_database(os.path.dirname(config_path))
+    if database_path is None:
+        with open(config_path, "w") as file:
+            yaml.dump(config, file, default_flow_style=False)
+        return
+
+    projects = config.get("projects") or {}
+    with _connect_backend_database(database_path) as connection:
+        for project, project_info in projects.items():
+            connection.execute(
+                "INSERT INTO projects (name, data_path, summary_path, output_path) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET data_path = excluded.data_path, summary_path = excluded.summary_path, output_path = excluded.output_path",
+                (project, project_info["data_path"], project_info["summary_path"], project_info["output_path"]),
+            )
+        existing_projects = [row[0] for row in connection.execute("SELECT name FROM projects")]
+        connection.executemany("DELETE FROM projects WHERE name = ?", [(project,) for project in existing_projects if project not in projects])
+
+# Function to move a project's curations to a new project name
+def rename_project_curations(directory, project, new_project):
+    database_path = get_backend_database(directory)
+    if database_path:
+        with _connect_backend_database(database_path) as connection:
+            # Rename the project row itself, keeping its revision and latest update (save_config then updates its paths)
+            connection.execute("DELETE FROM projects WHERE name = ?", (new_project,))
+            connection.execute("UPDATE projects SET name = ? WHERE name = ?", (new_project, project))
+            connection.execute("UPDATE samples SET project = ? WHERE project = ?", (new_project, project))
+            connection.execute("UPDATE curations SET project = ? WHERE project = ?", (new_project, project))
+            _bump_project_revision(connection, new_project)
+        return
+
+    #Move summary and journal files
+    generate_output_folders(directory, new_project)
+    for curation_file in (CURATION_SUMMARY_NAME, CURATION_JOURNAL_NAME):
+        if os.path.exists(os.path.join(directory, project, curation_file)):
+            os.rename(os.path.join(directory, project, curation_file), os.path.join(directory, new_project, curation_file))
+
+# Function to count the number of samples (the sample folders in data_path, as listed by get_folders)
+def count_samples(data_path):
+    return str(len(_scan_sample_folders(data_path))) if os.path.exists(data_path) else 0
+
+########################
+### Curation Journal ###
+########################
+# Curations are recorded in an append-only journal of set/remove events next to the curation summary. The summary
+# is the snapshot the journal is periodically compacted into. Sessions replay the journal from the last offset they
+# read, so writes are O(1) per action and concurrent curators merge instead of overwriting each other.
+CURATION_SUMMARY_NAME = "curation_summary.txt"
+CURATION_JOURNAL_NAME = "curation_journal.tsv"
+CURATION_LOCK_NAME = "curation_journal.lock"
+CURATION_JOURNAL_COMPACT_EVENTS = 1000  # Number of journal events after which the dashboard compacts the journal
+
+# Context manager to hold a shared (readers) or exclusive (writers) lock on a project's curation files
+@contextmanager
+def _curation_lock(summary_path, exclusive):
+    lock_directory = os.path.dirname(summary_path)
+    if fcntl is None or not os.path.isdir(lock_directory):
+        yield
+        return
+    with open(os.path.join(lock_directory, CURATION_LOCK_NAME), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+# Function to read the generation header of a journal, returning (generation, header length in bytes)
+def _read_journal_generation(journal_path):
+    try:
+        with open(journal_path, "rb") as f:
+            header = f.readline()
+    except FileNotFoundError:
+        return None, 0
+    if header.startswith(b"#generation\t") and header.endswith(b"\n"):
+        return header.split(b"\t", 1)[1].strip().decode(), len(header)
+    return None, 0
+
+# Function to apply the rows of a curation summary snapshot to a curated solutions dict
+def _apply_curation_snapshot(summary_path, curated_solutions):
     if os.path.exists(summary_path):
-        with open(summary_path, "r") as file:
-            lines = file.readlines()
-        curated_samples = set() #only count unqiue samples
-
-        for line in lines[1:]:
-            parts = line.strip().split("\t")
-            sample_name, curation_status, user, solution_filename, timestamp = parts
-            if curation_status != "None":
-                curated_samples.add(sample_name)
-        return str(len(curated_samples)) 
-        
-    return str(0)
+        with open(summary_path, 'r') as file:
+            lines = file.readlines()[1:]  # Skip header
 
-# Function to extract the users who have curated samples
-def get_curating_users(summary_path):
-    if os.path.exists(summary_path):
-        with open(summary_path, "r") as file:
-            lines = file.readlines()
-        users = set()
-
-        for line in lines[1:]:
-            parts = line.strip().split("\t")
-            sample_name, curation_status, user, solution_filename, timestamp = parts
-            if curation_status != "None":
-                users.add(user)
-        return ", ".join(users)
-        
-    return ""
+        for line in lines:
+            parts = line.rstrip("\r\n").split("\t")  # Keep trailing empty fields, e.g. a missing timestamp
+            if len(parts) == 5 and parts[1] != "None":
+                sample, formatted_solution_name, user, curated_solution_filename, timestamp = parts
+                curated_solutions.setdefault(sample, {})[user] = {"solution_pdf": curated_solution_filename, "timestamp": timestamp}
+
+# Function to apply journal events to a curated solutions dict
+def _apply_curation_events(lines, curated_solutions):
+    for line in lines:
+        parts = line.split("\t")
+        if len(parts) != 5:
+            continue
+        action, sample, user, curated_solution_filename, timestamp = parts
+        if action == "set":
+            curated_solutions.setdefault(sample, {})[user] = {"solution_pdf": curated_solution_filename, "timestamp": timestamp}
+        elif action == "remove" and user in curated_solutions.get(sample, {}):
+            curated_solutions[sample].pop(user)
+            if not curated_solutions[sample]:
+                del curated_solutions[sample]
+
+# Function to bring a curated solutions dict up to date with the snapshot and journal, without taking the lock
+def _replay_curations_unlocked(summary_path, curated_solutions, journal_state):
+    journal_path = os.path.join(os.path.dirname(summary_path), CURATION_JOURNAL_NAME)
+    generation, header_length = _read_journal_generation(journal_path)
+
+    # Start over from the snapshot the first time, or if the journal was compacted since it was last read
+    if "generation" not in journal_state or journal_state["generation"] != generation:
+        curated_solutions.clear()
+        _apply_curation_snapshot(summary_path, curated_solutions)
+        journal_state.update({"generation": generation, "offset": header_length, "events": 0})
+
+    # Replay the events appended since the last read, leaving any partially written line for next time
+    if generation is not None:
+        with open(journal_path, "rb") as f:
+            f.seek(journal_state["offset"])
+            appended = f.read()
+        complete = appended[:appended.rfind(b"\n") + 1]
+        lines = complete.decode("utf-8").splitlines()
+        _apply_curation_events(lines, curated_solutions)
+        journal_state["offset"] += len(complete)
+        journal_state["events"] += len(lines)
+
+    return curated_solutions
+
+# Function to bring a curated solutions dict up to date with a project's curation snapshot and journal
+@timed()
+def replay_curations(summary_path, curated_solutions=None, journal_state=None):
+    curated_solutions = {} if curated_solutions is None else curated_solutions
+    journal_state = {} if journal_state is None else journal_state
+
+    # SQLite backends keep a revision per project, so the curations are only re-read after a change
+    database_path, project = _get_summary_project(summary_path)
+    if database_path:
+        with _connect_backend_database(database_path) as connection:
+            revision = connection.execute("SELECT revision FROM projects WHERE name = ?", (project,)).fetchone()
+            if "revision" not in journal_state or journal_state["revision"] != revision:
+                curated_solutions.clear()
+                for sample, user, solution_pdf, timestamp in connection.execute(
+                    "SELECT sample, user, solution_pdf, timestamp FROM curations WHERE project = ? ORDER BY rowid", (project,)
+                ):
+                    curated_solutions.setdefault(sample, {})[user] = {"solution_pdf": solution_pdf, "timestamp": timestamp}
+                journal_state.clear()
+                journal_state.update({"revision": revision, "events": 0})
+        return curated_solutions
+
+    with _curation_lock(summary_path, exclusive=False):
+        return _replay_curations_unlocked(summary_path, curated_solutions, journal_state)
+
+# Function to append a curation event ("set" or "remove") to a project's journal
+@timed()
+def record_curation(directory, project, action, sample, user, solution_pdf="", timestamp=""):
+    summary_path = os.path.join(directory, project, CURATION_SUMMARY_NAME)
+    journal_path = os.path.join(directory, project, CURATION_JOURNAL_NAME)
+
+    database_path = get_backend_database(directory)
+    if database_path:
+        with _connect_backend_database(database_path) as connection:
+            if action == "set":
+                connection.execute("INSERT OR IGNORE INTO samples (project, sample) VALUES (?, ?)", (project, sample))
+                connection.execute("INSERT OR REPLACE INTO curations (project, sample, user, solution_pdf, timestamp) VALUES (?, ?, ?, ?, ?)", (project, sample, user, solution_pdf, timestamp))
+            elif action == "remove":
+                connection.execute("DELETE FROM curations WHERE project = ? AND sample = ? AND user = ?", (project, sample, user))
+            _bump_project_revision(connection, project)
+        return
+
+    os.makedirs(os.path.dirname(journal_path), exist_ok=True)
+
+    with _curation_lock(summary_path, exclusive=True):
+        with open(journal_path, "a") as f:
+            if f.tell() == 0:
+                f.write(f"#generation\t{uuid.uuid4().hex}\n")
+            f.write(f"{action}\t{sample}\t{user}\t{solution_pdf}\t{timestamp}\n")
+
+# Function to write the curation summary snapshot of a project straight from its curated solutions, without reading
+# any params files (the solution column of the snapshot is not read back)
+def _write_curation_snapshot(summary_path, curated_solutions):
+    # Write to a temporary file first, so a crash never leaves a partial snapshot behind
+    temp_path = f"{summary_path}.{uuid.uuid4().hex}.tmp"
+    with open(temp_path, "w") as file:
+        file.write(CURATION_SUMMARY_HEADER)
+        for sample, users in curated_solutions.items():
+            for user, curation in users.items():
+                file.write(f"{sample}\tCurated\t{user}\t{curation['solution_pdf']}\t{curation['timestamp']}\n")
+    os.replace(temp_path, summary_path)
+
+# Function to compact a project's journal into its curation summary snapshot
+@timed()
+def compact_curation_journal(directory, project, min_events=CURATION_JOURNAL_COMPACT_EVENTS):
+    if get_backend_database(directory):
+        return False  # SQLite backends have no journal
+
+    summary_path = os.path.join(directory, project, CURATION_SUMMARY_NAME)
+    journal_path = os.path.join(directory, project, CURATION_JOURNAL_NAME)
+
+    with _curation_lock(summary_path, exclusive=True):
+        journal_state = {}
+        curated_solutions = _replay_curations_unlocked(summary_path, {}, journal_state)
+        if journal_state["events"] < min_events:
+            return False  # Another session compacted the journal already
+
+        # Write the snapshot first, then start a new journal generation so readers reload the snapshot
+        _write_curation_snapshot(summary_path, curated_solutions)
+        temp_path = f"{journal_path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, "w") as f:
+            f.write(f"#generation\t{uuid.uuid4().hex}\n")
+        os.replace(temp_path, journal_path)
+
+    return True
 
 # Function to extract the time of the latest update
 def get_latest_update(summary_path):
-    if os.path.exists(summary_path):
-        mod_time = os.path.getmtime(summary_path)
-        return datetime.datetime.fromtimestamp(mod_time)
+    database_path, project = _get_summary_project(summary_path)
+    if database_path:
+        with _connect_backend_database(database_path) as connection:
+            row = connection.execute("SELECT updated FROM projects WHERE name = ?", (project,)).fetchone()
+        return datetime.datetime.fromtimestamp(row[0]) if row and row[0] else ""
+
+    journal_path = os.path.join(os.path.dirname(summary_path), CURATION_JOURNAL_NAME)
+    mod_times = [os.path.getmtime(path) for path in (summary_path, journal_path) if os.path.exists(path)]
+    if mod_times:
+        return datetime.datetime.fromtimestamp(max(mod_times))
     else:
         return ""
     
-# Function to load the curated solutions from the metadata file
+# Function to load the curated solutions from the metadata file, replaying only the journal events not yet read
+@timed()
 def load_curated_solutions(directory, project):
-    summary_file_path = os.path.join(directory, project, "curation_summary.txt")
-    
-    if os.path.exists(summary_file_path):
-        with open(summary_file_path, 'r') as file:
-            lines = file.readlines()[1:]  # Skip header
+    summary_file_path = os.path.join(directory, project, CURATION_SUMMARY_NAME)
 
-            for line in lines:
-                parts = line.strip().split("\t")
-                if len(parts) == 5 and parts[1] != "None":
-                    sample, formatted_solution_name, user, curated_solution_filename, timestamp = parts
+    # Read the existing curations into the session state
+    if "curated_solutions" not in st.session_state[project]:
+        st.session_state[project]["curated_solutions"] = {}
+    if "curation_journal" not in st.session_state[project]:
+        st.session_state[project]["curation_journal"] = {}
 
-                    # Read the existing summary into the session state
-                    if "curated_solutions" not in st.session_state[project]:
-                        st.session_state[project]["curated_solutions"] = {}
+    replay_curations(summary_file_path, st.session_state[project]["curated_solutions"], st.session_state[project]["curation_journal"])
 
-                    # Populate curated_solutions state with existing solutions
-                    if sample not in st.session_state[project]["curated_solutions"]:
-                        st.session_state[project]["curated_solutions"][sample] = {}
+##########################
+### Project Statistics ###
+##########################
+# The figures shown for each project on the overview page are computed together in one pass over its curations,
+# cached until the curation files (or SQLite revision) and data path change, and gathered for all projects concurrently.
+PROJECT_STATS_WORKERS = 8
 
-                    st.session_state[project]["curated_solutions"][sample][user] = {"solution_pdf": curated_solution_filename, "timestamp": timestamp}
+_project_stats_cache = {}  # summary path -> (signature, statistics)
+_project_stats_lock = threading.Lock()
+
+# Function to get the (mtime, size) of a file, or None if it does not exist
+def _stat_signature(path):
+    try:
+        path_stat = os.stat(path)
+        return path_stat.st_mtime_ns, path_stat.st_size
+    except (FileNotFoundError, TypeError):
+        return None
+
+# Function to compute the statistics of one project, reusing the cached ones if nothing changed
+def get_single_project_stats(project_info):
+    data_path = project_info["data_path"]
+    summary_path = project_info["summary_path"]
+    journal_path = os.path.join(os.path.dirname(summary_path), CURATION_JOURNAL_NAME)
+
+    # Find out whether anything the statistics depend on changed
+    database_path, project = _get_summary_project(summary_path)
+    if database_path:
+        with _connect_backend_database(database_path) as connection:
+            revision, updated = connection.execute("SELECT revision, updated FROM projects WHERE name = ?", (project,)).fetchone() or (None, None)
+        curation_signature = ("sqlite", revision, updated)
+    else:
+        curation_signature = (_stat_signature(summary_path), _stat_signature(journal_path))
+    signature = (curation_signature, _stat_signature(data_path))
+
+    with _project_stats_lock:
+        cached = _project_stats_cache.get(summary_path)
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    # Compute every figure from a single read of the curations
+    if database_path:
+        with _connect_backend_database(database_path) as connection:
+            curated_samples, users = connection.execute(
+                "SELECT COUNT(DISTINCT sample), GROUP_CONCAT(DISTINCT user) FROM curations WHERE project = ?", (project,)
+            ).fetchone()
+        curating_users = (users or "").replace(",", ", ")
+        latest_update = datetime.datetime.fromtimestamp(updated) if updated else ""
+    else:
+        curated_solutions = replay_curations(summary_path)
+        curated_samples = len([sample for sample, sample_users in curated_solutions.items() if sample_users])
+        curating_users = ", ".join(set(user for sample_users in curated_solutions.values() for user in sample_users))
+        mtimes = [file_signature[0] for file_signature in curation_signature if file_signature]
+        latest_update = datetime.datetime.fromtimestamp(max(mtimes) / 1e9) if mtimes else ""
+
+    project_stats = {
+        "samples": count_samples(data_path),
+        "curated_samples": str(curated_samples),
+        "curating_users": curating_users,
+        "latest_update": latest_update,
+    }
+    with _project_stats_lock:
+        _project_stats_cache[summary_path] = (signature, project_stats)
+    return project_stats
+
+# Function to gather the statistics of every project concurrently
+@timed()
+def get_project_stats(projects, max_workers=PROJECT_STATS_WORKERS):
+    if not projects:
+        return {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(projects))), thread_name_prefix="ichorCurate-stats") as executor:
+        return dict(zip(projects, executor.map(get_single_project_stats, projects.values())))
 
 # Function to ensure filepath starts and ends with a '/'
 def format_filepath(filepath):
@@ -171,21 +716,183 @@ def format_filepath(filepath):
     return filepath
 
 
+####################
+### Sample Index ###
+####################
+# Each project's data path is indexed once and stored in the backend folder. For every sample the index holds
+# the solution folders (n/p values, params file), the optimal solution, the genome-wide PDFs and the chromosome
+# PDFs. Samples are rescanned only when the mtime of their folder changes, so helpers that used to list the
+# sample folder on every call answer from memory instead.
+SAMPLE_INDEX_NAME = "sample_index.json"
+SAMPLE_INDEX_RESCAN_SECONDS = 30  # How often samples that look partially written are rescanned
+
+_sample_indexes = {}
+_sample_index_lock = threading.RLock()
+
+# Function to normalize a data path so it can be used as an index key
+def _normalize_data_path(data_path):
+    return os.path.normpath(os.path.abspath(data_path))
+
+# Function to scan a sample folder into an index entry
+def _scan_sample(sample_folder, sample):
+    sample_entry = {
+        "mtime_ns": os.stat(sample_folder).st_mtime_ns,
+        "scanned": time.time(),
+        "solutions": [],
+        "optimal": None,
+        "genome_wide_pdfs": [],
+        "chromosome_pdfs": [],
+    }
+
+    with os.scandir(sample_folder) as items:
+        for item in items:
+            if item.is_dir():
+                match = re.search(r"n([\d.]+)_p(\d+)$", item.name)
+                params_file = os.path.join(item.path, f"{sample}.params.txt")
+                sample_entry["solutions"].append({
+                    "folder": item.name,
+                    "n": match.group(1) if match else None,
+                    "p": match.group(2) if match else None,
+                    "params_file": params_file if os.path.isfile(params_file) else None,
+                })
+            elif "genomeWide_n" in item.name and item.name.endswith(".pdf"):
+                sample_entry["genome_wide_pdfs"].append(item.name)
+
+    sample_entry["solutions"].sort(key=lambda solution: solution["folder"])
+    sample_entry["genome_wide_pdfs"].sort()
+
+    # The optimal solution is the one ichorCNA wrote to a folder containing "optimal"
+    for solution in sample_entry["solutions"]:
+        if "optimal" in solution["folder"] and solution["n"] is not None:
+            sample_entry["optimal"] = [solution["n"], solution["p"]]
+            break
+
+    # All solutions share the same chromosome plot file names, so the first solution that has them is enough
+    for solution in sample_entry["solutions"]:
+        chromosome_directory = os.path.join(sample_folder, solution["folder"], sample)
+        if os.path.isdir(chromosome_directory):
+            chromosome_pdf_files = [f for f in os.listdir(chromosome_directory) if "CNA_chrchr" in f and f.endswith(".pdf")]
+            if chromosome_pdf_files:
+                sample_entry["chromosome_pdfs"] = sorted(chromosome_pdf_files, key=extract_chromosome_number)
+                break
+
+    return sample_entry
+
+# Function to check whether an index entry may still be filled in by a running ichorCNA job
+def _is_sample_entry_complete(sample_entry):
+    return bool(sample_entry["chromosome_pdfs"]) and all(
+        solution["params_file"] for solution in sample_entry["solutions"] if solution["n"] is not None
+    )
+
+# Function to get the index of a data path, creating an empty in-memory one if it has not been loaded
+def _get_sample_index(data_path):
+    data_path = _normalize_data_path(data_path)
+    with _sample_index_lock:
+        if data_path not in _sample_indexes:
+            _sample_indexes[data_path] = {"data_path": data_path, "data_mtime_ns": None, "samples": {}, "index_path": None, "dirty": False, "listed": 0, "validated": {}}
+        return _sample_indexes[data_path]
+
+# Function to write a sample index to the backend folder
+def save_sample_index(sample_index):
+    with _sample_index_lock:
+        if not sample_index["index_path"]:
+            return
+        os.makedirs(os.path.dirname(sample_index["index_path"]), exist_ok=True)
+        index_contents = {key: sample_index[key] for key in ("data_path", "data_mtime_ns", "samples")}
+        tmp_path = f"{sample_index['index_path']}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(index_contents, f)
+        os.replace(tmp_path, sample_index["index_path"])
+        sample_index["dirty"] = False
+
+# Function to load (or build) the sample index of a project's data path, and bring its sample list up to date
+@timed()
+def load_sample_index(data_path, index_path=None):
+    sample_index = _get_sample_index(data_path)
+
+    with _sample_index_lock:
+        # Seed the in-memory index from the copy persisted in the backend folder
+        if index_path and sample_index["index_path"] != index_path:
+            sample_index["index_path"] = index_path
+            try:
+                with open(index_path, "r") as f:
+                    persisted_index = json.load(f)
+                if persisted_index.get("data_path") == sample_index["data_path"] and not sample_index["samples"]:
+                    sample_index["data_mtime_ns"] = persisted_index["data_mtime_ns"]
+                    sample_index["samples"] = persisted_index["samples"]
+            except (FileNotFoundError, ValueError, KeyError):
+                pass
+
+        # Re-list the data path only when samples were added or removed
+        if sample_index["data_mtime_ns"] is not None and is_watched_since(sample_index["data_path"], sample_index["listed"]):
+            data_mtime_ns = sample_index["data_mtime_ns"]
+        else:
+            sample_index["listed"] = time.time()
+            data_mtime_ns = os.stat(sample_index["data_path"]).st_mtime_ns
+        if data_mtime_ns != sample_index["data_mtime_ns"]:
+            sample_folders = get_folders(sample_index["data_path"])
+            sample_index["samples"] = {sample: sample_index["samples"].get(sample) for sample in sample_folders}
+            sample_index["data_mtime_ns"] = data_mtime_ns
+            sample_index["dirty"] = True
+
+        if sample_index["dirty"]:
+            save_sample_index(sample_index)
+
+    return sample_index
+
+# Function to get the index entry of a sample, rescanning the sample folder only if it changed
+@timed()
+def get_sample_entry(sample_directory, sample):
+    sample_index = _get_sample_index(sample_directory)
+    sample_folder = os.path.join(sample_index["data_path"], sample)
+
+    with _sample_index_lock:
+        sample_entry = sample_index["samples"].get(sample)
+        validated = sample_index["validated"].get(sample, 0)
+
+    # A single stat tells whether the sample folder changed; samples that look partially written are rescanned periodically.
+    # Watched samples are rescanned only when the watcher reports a change, once they were checked since the watch started.
+    if sample_entry is not None and is_watched_since(sample_folder, max(sample_entry.get("scanned", 0), validated)):
+        return sample_entry
+    with _sample_index_lock:
+        sample_index["validated"][sample] = time.time()
+    if (
+        sample_entry is None
+        or os.stat(sample_folder).st_mtime_ns != sample_entry["mtime_ns"]
+        or (not _is_sample_entry_complete(sample_entry) and time.time() - sample_entry.get("scanned", 0) > SAMPLE_INDEX_RESCAN_SECONDS)
+    ):
+        generation = _get_path_generation(sample_folder)
+        sample_entry = _scan_sample(sample_folder, sample)
+        if generation == _get_path_generation(sample_folder):
+            with _sample_index_lock:
+                sample_index["samples"][sample] = sample_entry
+                sample_index["dirty"] = True
+
+    return sample_entry
+
 ###################
 ### curation.py ###
 ###################
 
-# Function to find the default solution and sort the genome wide pdfs so the optimal is listed first
-def promote_default_pdf(genome_wide_directory, genome_wide_pdf_files):
-        # Find the "optimal" subfolder and extract n and p values
-        n_value, p_value = None, None
-        for item in os.listdir(genome_wide_directory):
-            if os.path.isdir(os.path.join(genome_wide_directory, item)) and "optimal" in item:
-                # Extract n and p values using a regex
-                match = re.search(r"n([\d.]+)_p(\d+)$", item)
-                if match:
-                    n_value, p_value = match.groups()
-                    break
+# Function to find the default solution and sort the genome wide pdfs so the optimal is listed first, followed by the
+# other solutions in order of their ranking if ranking criteria are given
+@timed()
+def promote_default_pdf(genome_wide_directory, genome_wide_pdf_files, criteria=None):
+        # Find the "optimal" solution and its n and p values from the sample index
+        genome_wide_directory = os.path.normpath(genome_wide_directory)
+        sample_entry = get_sample_entry(os.path.dirname(genome_wide_directory), os.path.basename(genome_wide_directory))
+        n_value, p_value = sample_entry["optimal"] or (None, None)
+
+        # Order the solutions by their ranking, leaving any without params in filename order at the end
+        if criteria:
+            ranking = get_solution_ranking(os.path.dirname(genome_wide_directory), os.path.basename(genome_wide_directory), criteria)
+            ranks = {solution: rank for rank, solution in enumerate(ranking)}
+
+            def get_rank(pdf_file):
+                match = re.search(r"n([\d.]+)-p(\d+)\.pdf$", pdf_file)
+                return ranks.get((match.group(1), match.group(2)), len(ranks)) if match else len(ranks)
+
+            genome_wide_pdf_files.sort(key=get_rank)
 
         # If an optimal subfolder is found, prioritize its PDF in the list
         if n_value and p_value:
@@ -199,25 +906,24 @@ def promote_default_pdf(genome_wide_directory, genome_wide_pdf_files):
         
         return genome_wide_pdf_files
 
-# Function to get the first page as an image from a PDF
-def get_pdf_first_page_image(pdf_path):
-    with fitz.open(pdf_path) as pdf:
-        # Render the first page as an image
-        first_page = pdf[0]
-        pix = first_page.get_pixmap()  
-        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-    return img
-
 # Function to obtain the matching folder name that contains a substring
 def get_matching_folder(genome_wide_directory, extracted_solution_name):
+    genome_wide_directory = os.path.normpath(genome_wide_directory)
+    sample_entry = get_sample_entry(os.path.dirname(genome_wide_directory), os.path.basename(genome_wide_directory))
+
     solution_details_folder = None
-    for solution in os.listdir(genome_wide_directory):
-        if os.path.isdir(os.path.join(genome_wide_directory, solution)) and extracted_solution_name in solution:
-            solution_details_folder = solution
+    for solution in sample_entry["solutions"]:
+        if extracted_solution_name in solution["folder"]:
+            solution_details_folder = solution["folder"]
             break
 
     return solution_details_folder
 
+# Function to find the folder holding the details (params, per-chromosome plots) of a genome-wide solution PDF
+def get_solution_details_folder(genome_wide_directory, solution_pdf):
+    extracted_solution_name = re.search(r'n([^n]*?)\.pdf$', solution_pdf).group(1).replace('-', '_') # REGEX to extract the current solution name
+    return get_matching_folder(genome_wide_directory, extracted_solution_name)
+
 # Function to extract chromosome number from filename
 def extract_chromosome_number(file_name):
     # Regex to match either a number (1–22) or the letter "X" or "Y" before ".pdf"
@@ -234,6 +940,34 @@ def extract_chromosome_number(file_name):
             return 24  # Place Y after X #TODO Check if this is relevant
     return float('inf')  # Default to 'inf' if no match is found to push unrecognized items to the end
 
+# Function to get the name of a chromosome ("1" to "22", "X" or "Y") from the filename of its plot
+def get_chromosome_name(file_name):
+    chrom_number = extract_chromosome_number(file_name)
+    return {23: "X", 24: "Y"}.get(chrom_number, str(chrom_number))
+
+# Resolution and layout of the solution thumbnail grid
+THUMBNAIL_DPI = 36
+THUMBNAIL_COLUMNS = 4
+
+# Function to display a thumbnail of every genome-wide solution, returning the index of the one clicked (if any)
+@timed()
+def display_solution_thumbnails(genome_wide_directory, genome_wide_pdf_files, optimal_pdf, current_index):
+    # Render all thumbnails in one batched, parallel pass
+    thumbnails = get_pdf_first_page_images([os.path.join(genome_wide_directory, f) for f in genome_wide_pdf_files], dpi=THUMBNAIL_DPI)
+
+    selected_index = None
+    cols = st.columns(THUMBNAIL_COLUMNS)
+    for i, (pdf_file, thumbnail) in enumerate(zip(genome_wide_pdf_files, thumbnails)):
+        match = re.search(r"n([\d.]+)-p(\d+)\.pdf$", pdf_file)
+        solution_name = f"n{match.group(1)}, p{match.group(2)}" if match else pdf_file
+        with cols[i % THUMBNAIL_COLUMNS]:
+            st.image(thumbnail, use_container_width=True)
+            label = f"{'⭐ Optimal: ' if pdf_file == optimal_pdf else ''}{solution_name}{' (shown)' if i == current_index else ''}"
+            if st.button(label, key=f"thumbnail_{pdf_file}", use_container_width=True):
+                selected_index = i
+
+    return selected_index
+
 # Function to display and allow selecting of chromosomes
 def select_chromosomes(display_mode, solution_pdf, genome_wide_directory, genome_wide_pdf_files, chromosome_pdf_files):
     
@@ -241,54 +975,888 @@ def select_chromosomes(display_mode, solution_pdf, genome_wide_directory, genome
     cols = st.columns(23)
 
     # Display checkboxes across the columns
-    extracted_solution_name = re.search(r'n([^n]*?)\.pdf$', solution_pdf).group(1).replace('-', '_') # REGEX to extract the current solution name
-    solution_details_folder = get_matching_folder(genome_wide_directory, extracted_solution_name)     
+    solution_details_folder = get_solution_details_folder(genome_wide_directory, solution_pdf)
 
     selected_chromosomes = []
     for i, pdf_file in enumerate(chromosome_pdf_files):
-        chrom_number = extract_chromosome_number(pdf_file)  # Extract chromosome number from filename
-        if chrom_number == 23:
-            chrom_number = "X"
-        elif chrom_number == 24:
-            chrom_number = "Y"
-        checkbox_label = f"{chrom_number}"
+        checkbox_label = get_chromosome_name(pdf_file)  # Extract chromosome number from filename
         with cols[i % 23]:  # Distribute checkboxes across columns
             if st.checkbox(checkbox_label, key = display_mode + pdf_file):
                 selected_chromosomes.append(pdf_file) #If the checkbox is selected, add the chromosome to the list of selected chromosomes
 
     return selected_chromosomes, solution_details_folder
 
-# Function to plot the per-chromosome copy number data
-def display_chromosome_plots(selected_chromosomes, genome_wide_directory, solution_details_folder, sample_name):
+# Function to plot the per-chromosome copy number data, optionally combined into a single strip image, or drawn
+# from the copy-number tables of the solution if interactive
+@timed()
+def display_chromosome_plots(selected_chromosomes, genome_wide_directory, solution_details_folder, sample_name, combine=False, interactive=False, key=None):
+    if interactive and display_copy_number_plot(genome_wide_directory, solution_details_folder, sample_name, [get_chromosome_name(pdf_file) for pdf_file in selected_chromosomes], key=key):
+        return
+
     # If just one chromosome is selected, take up the whole page
     if len(selected_chromosomes) == 1:
         pdf_path = os.path.join(genome_wide_directory, solution_details_folder, sample_name, selected_chromosomes[0])
         if os.path.exists(pdf_path):
-            chrom_pdf_image = get_pdf_first_page_image(pdf_path)
-            st.image(chrom_pdf_image, caption=f"Chromosome {extract_chromosome_number(selected_chromosomes[0])}", use_container_width=True)
+            display_pdf_image(pdf_path, LAYOUT_WIDTH_PX, caption=f"Chromosome {extract_chromosome_number(selected_chromosomes[0])}")
+        return
+
+    pdf_paths = {}
+    for pdf_file in selected_chromosomes:
+        pdf_path = os.path.join(genome_wide_directory, solution_details_folder, sample_name, pdf_file)
+        if os.path.exists(pdf_path):
+            pdf_paths[pdf_file] = pdf_path
+        else:
+            st.write(f"Chromosome {extract_chromosome_number(pdf_file)} PDF not found.")
+    if not pdf_paths:
+        return
 
-    # If multiple chromosomes are selected, display them in a horizontal layout
+    # Only render as many pixels as a column can show
+    column_width = LAYOUT_WIDTH_PX // len(selected_chromosomes)
+
+    # Send all the selected chromosomes as one image
+    if combine:
+        st.image(get_chromosome_strip_image(list(pdf_paths.values()), column_width), use_container_width=True)
+
+    # If multiple chromosomes are selected, display them in a horizontal layout, rendered in one parallel pass
     else:
         display_cols = st.columns(len(selected_chromosomes))  # Create one column per selected PDF
+        chrom_pdf_images = dict(zip(pdf_paths, get_pdf_first_page_images(list(pdf_paths.values()), width=column_width)))
 
         for col, pdf_file in zip(display_cols, selected_chromosomes):
-            pdf_path = os.path.join(genome_wide_directory, solution_details_folder, sample_name, pdf_file)
-            if os.path.exists(pdf_path):
-                chrom_pdf_image = get_pdf_first_page_image(pdf_path)
-                col.image(chrom_pdf_image)#, caption=f"Chromosome {extract_chromosome_number(pdf_file)[0]}", use_container_width=True)    
-            else:
-                st.write(f"Chromosome {extract_chromosome_number(pdf_file)} PDF not found.")
+            if pdf_file in chrom_pdf_images:
+                col.image(chrom_pdf_images[pdf_file], use_container_width=True)#, caption=f"Chromosome {extract_chromosome_number(pdf_file)[0]}")
+
+
+####################
+### Render Cache ###
+####################
+# Rasterized PDF pages are cached in two tiers: a bounded in-memory LRU (per process, sized in bytes)
+# and an on-disk image store shared by every session and app process on the host. Entries are keyed
+# by (absolute path, mtime, size, DPI or pixel width), so a re-run of ichorCNA that rewrites a PDF is picked up automatically.
+RENDER_CACHE_DIR = os.environ.get("ICHORCURATE_RENDER_CACHE_DIR", os.path.join(tempfile.gettempdir(), "ichorCurate_render_cache"))
+RENDER_CACHE_MEMORY_BYTES = int(os.environ.get("ICHORCURATE_RENDER_CACHE_MEMORY_MB", 512)) * 1024 * 1024
+RENDER_CACHE_DISK_BYTES = int(os.environ.get("ICHORCURATE_RENDER_CACHE_DISK_MB", 4096)) * 1024 * 1024
+RENDER_CACHE_FORMAT = os.environ.get("ICHORCURATE_RENDER_CACHE_FORMAT", "PNG").upper()  # PNG or WEBP
+DEFAULT_RENDER_DPI = 72  # Matches the default resolution of fitz's get_pixmap()
+
+# Pages are rendered for the pixel width they are displayed at, rather than at a fixed resolution, so narrow
+# layouts (e.g. many chromosome columns) rasterize far fewer pixels. These pages are cached by the width they were
+# requested at, so a cached page is found without opening the PDF; the DPI is only derived from the page width
+# when the page is rasterized, rounded up to a coarse step.
+LAYOUT_WIDTH_PX = int(os.environ.get("ICHORCURATE_LAYOUT_WIDTH_PX", 1600))  # Device pixels across the main area
+RENDER_DPI_STEP = 12
+MIN_RENDER_DPI = 24
+MAX_RENDER_DPI = 288
+PREVIEW_RENDER_DPI = 24  # Low-resolution first paint while the sharp render is produced
+
+_render_memory_cache = OrderedDict()
+_render_memory_bytes = 0
+_render_disk_bytes = None  # Lazily initialized from a scan of the cache directory
+_render_cache_lock = threading.Lock()
+_fitz_lock = threading.Lock()  # MuPDF is not thread-safe, so rasterization is serialized within a process
+render_cache_stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "memory_evictions": 0, "disk_evictions": 0}
+
+# Function to build the cache key for a rendered PDF page, rendered at a DPI or to fill a pixel width
+def _render_cache_key(pdf_path, dpi, width=None):
+    pdf_path = os.path.abspath(pdf_path)
+    pdf_stat = os.stat(pdf_path)
+    resolution = f"w{width}" if width else dpi
+    key = f"{pdf_path}\0{pdf_stat.st_mtime_ns}\0{pdf_stat.st_size}\0{resolution}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+# Function to get the location of a rendered page in the on-disk store
+def _render_disk_path(key):
+    extension = ".webp" if RENDER_CACHE_FORMAT == "WEBP" else ".png"
+    return os.path.join(RENDER_CACHE_DIR, key[:2], key + extension)
+
+# Function to look up a rendered page in the in-memory tier, marking it as recently used
+def _render_memory_get(key):
+    with _render_cache_lock:
+        img = _render_memory_cache.get(key)
+        if img is not None:
+            _render_memory_cache.move_to_end(key)
+        return img
+
+# Function to add a rendered page to the in-memory tier, evicting the least recently used pages over budget
+def _render_memory_put(key, img):
+    global _render_memory_bytes
+    img_bytes = img.width * img.height * len(img.getbands())
+    if img_bytes > RENDER_CACHE_MEMORY_BYTES:
+        return
+
+    with _render_cache_lock:
+        if key in _render_memory_cache:
+            return
+        _render_memory_cache[key] = img
+        _render_memory_bytes += img_bytes
+        while _render_memory_bytes > RENDER_CACHE_MEMORY_BYTES:
+            _, evicted = _render_memory_cache.popitem(last=False)
+            _render_memory_bytes -= evicted.width * evicted.height * len(evicted.getbands())
+            render_cache_stats["memory_evictions"] += 1
+
+# Function to load a rendered page from the on-disk tier
+def _render_disk_get(key):
+    from PIL import Image
+
+    disk_path = _render_disk_path(key)
+    try:
+        with Image.open(disk_path) as cached:
+            img = cached.convert("RGB")
+        os.utime(disk_path)  # Refresh the mtime so disk eviction is least-recently-used
+        return img
+    except (FileNotFoundError, OSError):
+        return None
+
+# Function to list every file in an on-disk cache as (mtime, size, path)
+def _scan_disk_cache(cache_dir):
+    entries = []
+    if not os.path.isdir(cache_dir):
+        return entries
+    for bucket in os.scandir(cache_dir):
+        if not bucket.is_dir():
+            continue
+        for entry in os.scandir(bucket.path):
+            try:
+                entry_stat = entry.stat()
+            except FileNotFoundError:
+                continue  # Removed by another process
+            entries.append((entry_stat.st_mtime, entry_stat.st_size, entry.path))
+    return entries
+
+# Function to evict the least recently used files of an on-disk cache until it is back under budget, returning
+# (bytes left, number of files evicted)
+def _evict_disk_cache(cache_dir, budget_bytes):
+    entries = sorted(_scan_disk_cache(cache_dir))
+    total = sum(size for _, size, _ in entries)
+    target = budget_bytes * 0.9  # Leave some headroom so eviction does not run on every write
+    evicted = 0
+    for _, size, path in entries:
+        if total <= target:
+            break
+        try:
+            os.remove(path)
+            evicted += 1
+        except FileNotFoundError:
+            pass
+        total -= size
+    return total, evicted
+
+# Function to evict the oldest pages from the on-disk tier until it is back under budget
+def _evict_render_disk_cache():
+    global _render_disk_bytes
+    _render_disk_bytes, evicted = _evict_disk_cache(RENDER_CACHE_DIR, RENDER_CACHE_DISK_BYTES)
+    render_cache_stats["disk_evictions"] += evicted
+
+# Function to write a rendered page to the on-disk tier
+def _render_disk_put(key, img):
+    global _render_disk_bytes
+    disk_path = _render_disk_path(key)
+    try:
+        os.makedirs(os.path.dirname(disk_path), exist_ok=True)
+        # Write to a temporary file and rename, so other processes never read a partial image
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(disk_path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            img.save(f, format=RENDER_CACHE_FORMAT)
+        os.replace(tmp_path, disk_path)
+        written = os.path.getsize(disk_path)
+    except OSError as e:
+        print(f"Warning: unable to write render cache entry {disk_path}: {e}")
+        return
+
+    with _render_cache_lock:
+        if _render_disk_bytes is None:
+            _render_disk_bytes = sum(size for _, size, _ in _scan_disk_cache(RENDER_CACHE_DIR))
+        else:
+            _render_disk_bytes += written
+        if _render_disk_bytes > RENDER_CACHE_DISK_BYTES:
+            _evict_render_disk_cache()
+
+# Function to get the DPI at which a page of a given width (in points) is rendered to fill a given pixel width
+def get_render_dpi(page_width, width):
+    dpi = 72 * width / page_width
+    dpi = RENDER_DPI_STEP * -(-dpi // RENDER_DPI_STEP)
+    return int(min(MAX_RENDER_DPI, max(MIN_RENDER_DPI, dpi)))
+
+# Function to rasterize the first page of a PDF, at a DPI or to fill a pixel width
+def _rasterize_pdf_first_page(pdf_path, dpi, width=None):
+    import fitz  # PyMuPDF
+    from PIL import Image
+
+    with _fitz_lock:
+        with fitz.open(pdf_path) as pdf:
+            # Render the first page as an image
+            first_page = pdf[0]
+            if width:
+                dpi = get_render_dpi(first_page.rect.width, width)
+            pix = first_page.get_pixmap(dpi=dpi)
+            img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+    return img
+
+# Function to look up a rendered page in both tiers of the cache, without rasterizing it on a miss
+def _render_cache_get(key):
+    # First tier: in-memory LRU
+    img = _render_memory_get(key)
+    if img is not None:
+        render_cache_stats["memory_hits"] += 1
+        return img
+
+    # Second tier: on-disk store shared between processes
+    img = _render_disk_get(key)
+    if img is not None:
+        render_cache_stats["disk_hits"] += 1
+        _render_memory_put(key, img)
+    return img
 
+# Function to get the first page as an image from a PDF, rendered at a DPI or to fill a pixel width
+@timed()
+def get_pdf_first_page_image(pdf_path, dpi=DEFAULT_RENDER_DPI, width=None):
+    key = _render_cache_key(pdf_path, dpi, width)
+    img = _render_cache_get(key)
+    if img is not None:
+        return img
+
+    # Cache miss: rasterize the PDF and populate both tiers
+    render_cache_stats["misses"] += 1
+    with timing_span("rasterize_pdf"):
+        img = _rasterize_pdf_first_page(pdf_path, dpi, width)
+    _render_disk_put(key, img)
+    _render_memory_put(key, img)
+    return img
+
+# Function to display the first page of a PDF at a given pixel width, showing a quick low-resolution preview
+# while a page that is not cached yet is rendered sharply
+def display_pdf_image(pdf_path, width=LAYOUT_WIDTH_PX, container=st, caption=None):
+    img = _render_cache_get(_render_cache_key(pdf_path, None, width))
+    if img is None:
+        placeholder = container.empty()
+        placeholder.image(get_pdf_first_page_image(pdf_path, PREVIEW_RENDER_DPI), caption=caption, use_container_width=True)
+        placeholder.image(get_pdf_first_page_image(pdf_path, width=width), caption=caption, use_container_width=True)
+    else:
+        container.image(img, caption=caption, use_container_width=True)
+
+# Batches of PDFs are rasterized on a pool of worker processes, since MuPDF only renders one page at a time per
+# process. Workers write their renders to the on-disk tier, from which the app process loads them.
+RENDER_WORKERS = int(os.environ.get("ICHORCURATE_RENDER_WORKERS", min(8, os.cpu_count() or 1)))
+
+_render_process_pool = None
+_render_process_pool_lock = threading.Lock()
+
+# Function to get the process pool used for batch rendering
+def _get_render_process_pool():
+    global _render_process_pool
+    with _render_process_pool_lock:
+        if _render_process_pool is None:
+            # Forking a multi-threaded server is unsafe, so workers are started from a clean process
+            start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _render_process_pool = ProcessPoolExecutor(max_workers=RENDER_WORKERS, mp_context=multiprocessing.get_context(start_method))
+    return _render_process_pool
+
+# Function to discard the process pool, e.g. after a worker crashed and left it unusable
+def _reset_render_process_pool():
+    global _render_process_pool
+    with _render_process_pool_lock:
+        if _render_process_pool is not None:
+            _render_process_pool.shutdown(wait=False, cancel_futures=True)
+            _render_process_pool = None
+
+# Function run in the worker processes to render a PDF into the on-disk tier, returning its cache key
+def _render_to_disk_cache(pdf_path, dpi, width=None):
+    key = _render_cache_key(pdf_path, dpi, width)
+    if not os.path.exists(_render_disk_path(key)):
+        _render_disk_put(key, _rasterize_pdf_first_page(pdf_path, dpi, width))
+    return key
+
+# Function to get the first page of several PDFs as images, rasterizing the uncached ones in parallel
+@timed()
+def get_pdf_first_page_images(pdf_paths, dpi=DEFAULT_RENDER_DPI, max_workers=RENDER_WORKERS, width=None):
+    images = {}
+    uncached_paths = []
+    for pdf_path in dict.fromkeys(pdf_paths):
+        img = _render_cache_get(_render_cache_key(pdf_path, dpi, width))
+        if img is not None:
+            images[pdf_path] = img
+        else:
+            uncached_paths.append(pdf_path)
+
+    # Rasterize the uncached PDFs on the worker processes, falling back to this process if that fails
+    if len(uncached_paths) > 1 and max_workers > 1:
+        try:
+            with timing_span("rasterize_pdfs_in_workers"):
+                keys = list(_get_render_process_pool().map(_render_to_disk_cache, uncached_paths, [dpi] * len(uncached_paths), [width] * len(uncached_paths)))
+        except Exception as e:
+            print(f"Warning: parallel rendering failed, rendering in the app process instead: {e}")
+            _reset_render_process_pool()
+            keys = [None] * len(uncached_paths)
+        for pdf_path, key in zip(uncached_paths, keys):
+            img = _render_disk_get(key) if key else None
+            if img is not None:
+                render_cache_stats["misses"] += 1
+                _render_memory_put(key, img)
+                images[pdf_path] = img
+
+    for pdf_path in uncached_paths:
+        if pdf_path not in images:
+            images[pdf_path] = get_pdf_first_page_image(pdf_path, dpi, width)
+
+    return [images[pdf_path] for pdf_path in pdf_paths]
+
+# Function to get several PDFs side by side as one strip image, each page rendered to fill a given pixel width.
+# Strips are cached like single pages, keyed by the cache keys of their pages, so a strip is rebuilt whenever
+# the chromosome set or one of its PDFs changes.
+@timed()
+def get_chromosome_strip_image(pdf_paths, width):
+    page_keys = [_render_cache_key(pdf_path, None, width) for pdf_path in pdf_paths]
+    key = hashlib.sha1(("strip\0" + "\0".join(page_keys)).encode("utf-8")).hexdigest()
+    strip = _render_cache_get(key)
+    if strip is not None:
+        return strip
+
+    from PIL import Image
+
+    render_cache_stats["misses"] += 1
+    images = get_pdf_first_page_images(pdf_paths, width=width)
+    strip = Image.new("RGB", (sum(img.width for img in images), max(img.height for img in images)), "white")
+    x = 0
+    for img in images:
+        strip.paste(img, (x, 0))
+        x += img.width
+    _render_disk_put(key, strip)
+    _render_memory_put(key, strip)
+    return strip
+
+# Function to report the render cache hit/miss counters and current sizes
+def get_render_cache_stats():
+    with _render_cache_lock:
+        stats = dict(render_cache_stats)
+        stats["memory_entries"] = len(_render_memory_cache)
+        stats["memory_bytes"] = _render_memory_bytes
+        stats["disk_bytes"] = _render_disk_bytes
+    return stats
+
+################
+### Prefetch ###
+################
+# While a curator looks at one solution, the neighbouring solutions and the chromosome plots of the current
+# solution are rendered on a background thread pool, so the next key press is served from the render cache.
+PREFETCH_WORKERS = int(os.environ.get("ICHORCURATE_PREFETCH_WORKERS", 2))
+PREFETCH_DEPTH = 2  # Number of neighbouring solutions rendered on either side of the current one
+PREFETCH_SESSION_CAP = 32  # Maximum number of pending background renders per session
+
+_prefetch_executor = None
+_prefetch_executor_lock = threading.Lock()
+
+# Function to get the thread pool shared by all sessions for background rendering
+def _get_prefetch_executor():
+    global _prefetch_executor
+    with _prefetch_executor_lock:
+        if _prefetch_executor is None:
+            _prefetch_executor = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="ichorCurate-prefetch")
+    return _prefetch_executor
+
+# Function to render a PDF into the render cache, ignoring failures since nobody is waiting on the result
+def _prefetch_pdf_image(pdf_path, dpi, width):
+    try:
+        get_pdf_first_page_image(pdf_path, dpi, width)
+    except Exception as e:
+        print(f"Warning: unable to prefetch {pdf_path}: {e}")
+
+# Function to list the renders worth prefetching as (path, DPI, width) tuples, nearest neighbours first, at the
+# width they are displayed at, then quick previews of the current solution's chromosome plots, whose widths
+# depend on how many chromosomes get selected
+def get_prefetch_paths(genome_wide_directory, genome_wide_pdf_files, pdf_index, sample_name, chromosome_pdf_files, depth=PREFETCH_DEPTH):
+    prefetch_paths = []
+    for offset in range(1, depth + 1):
+        for neighbour_index in (pdf_index + offset, pdf_index - offset):
+            if 0 <= neighbour_index < len(genome_wide_pdf_files):
+                prefetch_paths.append((os.path.join(genome_wide_directory, genome_wide_pdf_files[neighbour_index]), DEFAULT_RENDER_DPI, LAYOUT_WIDTH_PX))
+
+    if genome_wide_pdf_files and chromosome_pdf_files:
+        solution_details_folder = get_solution_details_folder(genome_wide_directory, genome_wide_pdf_files[pdf_index])
+        if solution_details_folder:
+            for pdf_file in chromosome_pdf_files:
+                prefetch_paths.append((os.path.join(genome_wide_directory, solution_details_folder, sample_name, pdf_file), PREVIEW_RENDER_DPI, None))
+
+    return prefetch_paths
+
+# Function to queue background renders for one session, cancelling the queued work of a previously viewed sample
+def prefetch_pdf_images(prefetch_state, sample_key, pdf_paths, session_cap=PREFETCH_SESSION_CAP):
+    # Drop any work that is still queued for a different sample
+    if prefetch_state.get("sample_key") != sample_key:
+        for future in prefetch_state.get("futures", {}).values():
+            future.cancel()
+        prefetch_state["sample_key"] = sample_key
+        prefetch_state["futures"] = {}
+
+    futures = prefetch_state["futures"]
+    for render in [render for render, future in futures.items() if future.done()]:
+        del futures[render]
+
+    executor = _get_prefetch_executor()
+    for render in pdf_paths:
+        if len(futures) >= session_cap:
+            break
+        if render not in futures and os.path.exists(render[0]):
+            futures[render] = executor.submit(_prefetch_pdf_image, *render)
+
+#########################
+### Copy-Number Plots ###
+#########################
+# Solutions can also be plotted from the bin-level (.cna.seg) and segment (.seg.txt) tables in their folder, instead
+# of rasterizing ichorCNA's PDFs. Each table is parsed once into a Parquet file in a cache folder shared by every
+# session and app process, keyed by (absolute path, mtime, size) like the render cache, and the plots are drawn with
+# plotly, so zooming into a region happens in the browser without any rendering.
+CNA_CACHE_DIR = os.environ.get("ICHORCURATE_CNA_CACHE_DIR", os.path.join(tempfile.gettempdir(), "ichorCurate_cna_cache"))
+CNA_CACHE_DISK_BYTES = int(os.environ.get("ICHORCURATE_CNA_CACHE_MB", 1024)) * 1024 * 1024  # Least recently used tables are evicted first
+CNA_MEMORY_TABLES = 64  # Parsed tables kept in memory per app process
+CNA_TABLE_SUFFIXES = {"bins": ".cna.seg", "segments": ".seg.txt"}
+CNA_PLOT_HEIGHT = 400
+CNA_CALL_COLORS = {"HOMD": "#00A000", "HETD": "#006400", "NEUT": "#0000FF", "GAIN": "#8B0000", "AMP": "#FF0000", "HLAMP": "#FF0000"}  # ichorCNA's colours
+CNA_OTHER_COLOR = "#A0A0A0"
+
+_cna_memory_cache = OrderedDict()
+_cna_disk_bytes = None  # Lazily initialized from a scan of the cache directory
+_cna_cache_lock = threading.Lock()
+
+# Function to parse an ichorCNA table into an Arrow table, dropping the sample name from the bin-level column names
+# (e.g. "<sample>.logR") and naming the chromosome column "chr" without a "chr" prefix in both tables
+def _parse_cna_table(table_path, sample_name):
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+
+    table = pa_csv.read_csv(
+        table_path,
+        parse_options=pa_csv.ParseOptions(delimiter="\t"),
+        convert_options=pa_csv.ConvertOptions(null_values=["NA", "NaN", ""], column_types={"chr": pa.string(), "chrom": pa.string()}),
+    )
+    column_names = []
+    for name in table.column_names:
+        if name.startswith(f"{sample_name}."):
+            name = name[len(sample_name) + 1:]
+        column_names.append("chr" if name == "chrom" else name)
+    table = table.rename_columns(column_names)
+    return table.set_column(column_names.index("chr"), "chr", pc.replace_substring_regex(table.column("chr"), "^chr", ""))
+
+# Function to write the Parquet copy of a table to the cache folder, evicting the least recently used copies once it
+# is over budget
+def _cna_disk_put(cache_path, table):
+    global _cna_disk_bytes
+    import pyarrow.parquet as pq
+
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        temp_path = f"{cache_path}.{uuid.uuid4().hex}.tmp"
+        pq.write_table(table, temp_path)
+        os.replace(temp_path, cache_path)
+        written = os.path.getsize(cache_path)
+    except OSError as e:
+        print(f"Warning: unable to write cached table {cache_path}: {e}")
+        return
+
+    with _cna_cache_lock:
+        if _cna_disk_bytes is None:
+            _cna_disk_bytes = sum(size for _, size, _ in _scan_disk_cache(CNA_CACHE_DIR))
+        else:
+            _cna_disk_bytes += written
+        if _cna_disk_bytes > CNA_CACHE_DISK_BYTES:
+            _cna_disk_bytes, _ = _evict_disk_cache(CNA_CACHE_DIR, CNA_CACHE_DISK_BYTES)
+
+# Function to load an ichorCNA table as {column: NumPy array}, from memory, the Parquet cache or the table itself
+@timed()
+def load_cna_table(table_path, sample_name):
+    table_path = os.path.abspath(table_path)
+    table_stat = os.stat(table_path)
+    key = hashlib.sha1(f"{table_path}\0{table_stat.st_mtime_ns}\0{table_stat.st_size}".encode("utf-8")).hexdigest()
+    with _cna_cache_lock:
+        if key in _cna_memory_cache:
+            _cna_memory_cache.move_to_end(key)
+            return _cna_memory_cache[key]
+
+    import pyarrow.parquet as pq
+
+    # Read the Parquet copy of the table, or parse the table and write one
+    cache_path = os.path.join(CNA_CACHE_DIR, key[:2], key + ".parquet")
+    table = None
+    if os.path.exists(cache_path):
+        try:
+            table = pq.read_table(cache_path)
+            os.utime(cache_path)  # Refresh the mtime so eviction is least-recently-used
+        except Exception as e:
+            print(f"Warning: ignoring unreadable cached table {cache_path}: {e}")
+    if table is None:
+        table = _parse_cna_table(table_path, sample_name)
+        _cna_disk_put(cache_path, table)
+
+    columns = {name: table.column(name).to_numpy() for name in table.column_names}
+    with _cna_cache_lock:
+        _cna_memory_cache[key] = columns
+        while len(_cna_memory_cache) > CNA_MEMORY_TABLES:
+            _cna_memory_cache.popitem(last=False)
+    return columns
+
+# Function to load the bin-level and segment tables of a solution folder, returning None if it has no bin-level table
+def get_cna_tables(solution_folder_path, sample_name):
+    table_paths = {name: os.path.join(solution_folder_path, sample_name + suffix) for name, suffix in CNA_TABLE_SUFFIXES.items()}
+    if not os.path.exists(table_paths["bins"]):
+        return None
+    bins = load_cna_table(table_paths["bins"], sample_name)
+    segments = load_cna_table(table_paths["segments"], sample_name) if os.path.exists(table_paths["segments"]) else None
+    return bins, segments
+
+# Function to draw the copy number of a solution along the genome, or along some of its chromosomes side by side,
+# as the log ratio of every bin coloured by its call with the segment medians on top
+@timed()
+def make_copy_number_figure(bins, segments=None, chromosomes=None, title=None):
+    import numpy as np
+    import plotly.graph_objects as go
+
+    # Lay the chromosomes out end to end, in karyotype order
+    chromosome_order = sorted(np.unique(bins["chr"]), key=lambda chromosome: extract_chromosome_number(f"{chromosome}.pdf"))
+    if chromosomes:
+        chromosome_order = [chromosome for chromosome in chromosome_order if chromosome in chromosomes]
+    offsets = {}
+    genome_length = 0
+    for chromosome in chromosome_order:
+        offsets[chromosome] = genome_length
+        genome_length += bins["end"][bins["chr"] == chromosome].max()
+
+    # Function to get the position of every row of a table along the plot, and whether the row is plotted
+    def get_positions(table, column):
+        plotted = np.isin(table["chr"], chromosome_order)
+        positions = table[column].astype(float)
+        for chromosome, offset in offsets.items():
+            positions[table["chr"] == chromosome] += offset
+        return positions, plotted
+
+    traces = []
+    bin_positions, plotted = get_positions(bins, "start")
+    calls = bins["Corrected_Call"] if "Corrected_Call" in bins else bins["event"]
+    for call in np.unique(calls[plotted].astype(str)):
+        in_call = plotted & (calls == call)
+        traces.append(go.Scattergl(
+            x=bin_positions[in_call], y=bins["logR"][in_call], mode="markers", name=str(call),
+            marker=dict(size=3, color=CNA_CALL_COLORS.get(call, CNA_OTHER_COLOR)),
+            hovertemplate=f"{call}<br>log2 ratio %{{y:.2f}}<extra></extra>",
+        ))
+
+    # Draw every segment as a line, separated from the next one by a gap
+    if segments is not None and "seg.median.logR" in segments:
+        segment_starts, plotted = get_positions(segments, "start")
+        segment_ends, _ = get_positions(segments, "end")
+        gaps = np.full(plotted.sum(), np.nan)
+        traces.append(go.Scattergl(
+            x=np.column_stack([segment_starts[plotted], segment_ends[plotted], gaps]).ravel(),
+            y=np.column_stack([segments["seg.median.logR"][plotted], segments["seg.median.logR"][plotted], gaps]).ravel(),
+            mode="lines", name="Segments", line=dict(color="black", width=2), hoverinfo="skip",
+        ))
+
+    # Separate the chromosomes and label them in the middle, building the layout in one go since adding
+    # shapes one at a time revalidates the whole figure
+    chromosome_starts = list(offsets.values())
+    chromosome_ends = chromosome_starts[1:] + [genome_length]
+    layout = dict(
+        title=title, height=CNA_PLOT_HEIGHT, margin=dict(l=60, r=20, t=40 if title else 20, b=40),
+        legend=dict(orientation="h", y=1.02, x=1, xanchor="right", yanchor="bottom"),
+        xaxis=dict(
+            tickvals=[(start + end) / 2 for start, end in zip(chromosome_starts, chromosome_ends)], ticktext=chromosome_order,
+            range=[0, genome_length], title_text="Chromosome", showgrid=False,
+        ),
+        yaxis=dict(title_text="Copy Number (log2 ratio)", zeroline=True),
+        shapes=[dict(type="line", xref="x", yref="paper", x0=offset, x1=offset, y0=0, y1=1, line=dict(color="lightgrey", width=1)) for offset in chromosome_starts[1:]],
+    )
+    fig = go.Figure(data=traces, layout=layout)
+    return fig
+
+# Function to display a solution as an interactive copy-number plot, returning False if it has no tables to plot
+def display_copy_number_plot(genome_wide_directory, solution_details_folder, sample_name, chromosomes=None, title=None, key=None, container=st):
+    tables = get_cna_tables(os.path.join(genome_wide_directory, solution_details_folder), sample_name) if solution_details_folder else None
+    if tables is None:
+        return False
+    container.plotly_chart(make_copy_number_figure(*tables, chromosomes, title), use_container_width=True, key=key)
+    return True
+
+########################
+### Solution Ranking ###
+########################
+# The candidate solutions of every sample are ranked from the project's params table in one vectorized pass, so the
+# curation page lists the likely answer right after ichorCNA's optimal solution. Rankings are cached per params table
+# and criteria, and a sample whose params files changed since the table was built is ranked on its own.
+RANKING_CRITERIA = {"loglik": "Log-likelihood", "tumor_fraction": "Tumor fraction", "ploidy": "Ploidy plausibility"}
+RANKING_DEFAULT_CRITERIA = tuple(c for c in os.environ.get("ICHORCURATE_RANKING_CRITERIA", "loglik").split(",") if c in RANKING_CRITERIA)
+RANKING_EXPECTED_PLOIDY = 2  # Ploidies are ranked by their distance to this one
+
+_solution_rankings = {}  # (data path, criteria) -> (params table they were ranked from, {sample: (signature, [(n, p), ...])})
+
+# Function to score every row of a params table by a ranking criterion, higher scores ranking first
+def _get_ranking_scores(params_table, criterion):
+    import pandas as pd
+
+    if criterion == "loglik":
+        return pd.to_numeric(params_table["Loglik"], errors="coerce") if "Loglik" in params_table else pd.Series(float("nan"), index=params_table.index)
+    if criterion == "tumor_fraction":
+        return pd.to_numeric(params_table["tumor_fraction"], errors="coerce")
+    return -(pd.to_numeric(params_table["ploidy"], errors="coerce") - RANKING_EXPECTED_PLOIDY).abs()
+
+# Function to rank the solutions of every sample in a params table, optimal first and then by each criterion in turn,
+# returning {sample: (signature of its params files, [(n, p), ...])}
+@timed()
+def rank_solutions(params_table, criteria=RANKING_DEFAULT_CRITERIA):
+    import pandas as pd
+
+    signatures = {}
+    for sample, params_file, mtime_ns in params_table[["sample", "params_file", "mtime_ns"]].itertuples(index=False):
+        signatures.setdefault(sample, []).append((params_file, mtime_ns))
+
+    # The optimal solution of a sample is the one in its first folder containing "optimal", as in the sample index
+    ranked = params_table[["sample", "folder", "n", "p"]].copy()
+    optimal_folders = ranked[ranked["folder"].str.contains("optimal", regex=False) & ranked["n"].notna()]
+    optimal_solutions = optimal_folders.sort_values("folder").drop_duplicates("sample")[["sample", "n", "p"]]
+    ranked["optimal"] = pd.MultiIndex.from_frame(ranked[["sample", "n", "p"]]).isin(pd.MultiIndex.from_frame(optimal_solutions))
+    score_columns = [f"score_{criterion}" for criterion in criteria]
+    for criterion, column in zip(criteria, score_columns):
+        ranked[column] = _get_ranking_scores(params_table, criterion)
+    ranked = ranked.sort_values(["sample", "optimal"] + score_columns, ascending=[True, False] + [False] * len(score_columns), kind="stable", na_position="last")
+    ranked = ranked.drop_duplicates(["sample", "n", "p"])  # The optimal folder duplicates one of the solutions
+
+    rankings = {sample: (tuple(signature), []) for sample, signature in signatures.items()}
+    for sample, n_value, p_value in ranked[["sample", "n", "p"]].itertuples(index=False):
+        rankings[sample][1].append((n_value, p_value))
+    return rankings
+
+# Function to get the rankings of a whole project, reusing them until its params table changes
+def rank_project_solutions(sample_directory, criteria=RANKING_DEFAULT_CRITERIA):
+    return _get_project_rankings(_normalize_data_path(sample_directory), load_params_table(sample_directory), tuple(criteria))
+
+# Function to get the cached rankings of a params table, ranking it if it was not ranked yet
+def _get_project_rankings(data_path, params_table, criteria):
+    with _params_lock:
+        cached = _solution_rankings.get((data_path, criteria))
+    if cached and cached[0] is params_table:
+        return cached[1]
+    rankings = rank_solutions(params_table, criteria)
+    with _params_lock:
+        _solution_rankings[(data_path, criteria)] = (params_table, rankings)
+    return rankings
+
+# Function to get the ranked (n, p) solutions of one sample, from the project's rankings if its params files are unchanged
+def get_solution_ranking(sample_directory, sample, criteria=RANKING_DEFAULT_CRITERIA):
+    import pandas as pd
+
+    criteria = tuple(criteria)
+    rows = _get_sample_params_rows(sample_directory, sample)
+    signature = tuple((row["params_file"], row["mtime_ns"]) for row in rows)
+
+    # Use the rankings of the whole project, if its params table was built (e.g. in the background by the dashboard)
+    data_path = _normalize_data_path(sample_directory)
+    with _params_lock:
+        cached_table = _params_tables.get(data_path)
+    if cached_table:
+        rankings = _get_project_rankings(data_path, cached_table[1], criteria)
+        if sample in rankings and rankings[sample][0] == signature:
+            return rankings[sample][1]
+
+    return rank_solutions(pd.DataFrame(rows), criteria)[sample][1] if rows else []
+
+########################
+### Background Tasks ###
+########################
+# Whole-project work that no page needs to draw (journal compaction, params table refreshes) runs on a small
+# background pool, so it never delays a rerun. Tasks are deduplicated by key while they are running.
+BACKGROUND_WORKERS = 2
+
+_background_executor = None
+_background_tasks = {}
+_background_lock = threading.Lock()
+
+# Function to run a task in the background, unless a task with the same key is still running
+def submit_background_task(task_key, function, *args, **kwargs):
+    global _background_executor
+    with _background_lock:
+        if _background_executor is None:
+            _background_executor = ThreadPoolExecutor(max_workers=BACKGROUND_WORKERS, thread_name_prefix="ichorCurate-background")
+        future = _background_tasks.get(task_key)
+        if future is None or future.done():
+            future = _background_executor.submit(_run_background_task, task_key, function, *args, **kwargs)
+            _background_tasks[task_key] = future
+    return future
+
+# Function to run a background task, logging failures since nobody is waiting on the result
+def _run_background_task(task_key, function, *args, **kwargs):
+    try:
+        return function(*args, **kwargs)
+    except Exception as e:
+        print(f"Warning: background task {task_key} failed: {e}")
+
+##########################
+### Filesystem Watcher ###
+##########################
+# Optionally, the data path and backend folder of each open project are watched for filesystem events. Events turn
+# into targeted invalidations (the sample listing, one sample's index entry, one params file), and a watched path
+# skips the mtime checks otherwise made on every rerun. Each watched path has a generation counter that open
+# dashboards poll in memory to refresh when new ichorCNA output lands.
+# - "off": no watcher, caches are validated by mtime on every rerun
+# - "native": inotify (or the platform equivalent), which does not see writes made by other hosts on network filesystems
+# - "polling": a single background thread that rescans the watched paths, which does work on network filesystems
+WATCHER_MODES = ["off", "native", "polling"]
+WATCHER_MODE = os.environ.get("ICHORCURATE_WATCHER", "off").lower()
+WATCHER_POLL_SECONDS = int(os.environ.get("ICHORCURATE_WATCHER_POLL_SECONDS", 10))
+WATCHER_REFRESH_SECONDS = 5  # How often open dashboards check for changes
+
+_watch_observer = None
+_watched_paths = {}  # watched path -> "data" or "backend"
+_watch_generations = {}  # watched path -> number of event batches seen
+_watch_started = {}  # watched path -> time from which its events are seen
+_watch_lock = threading.Lock()
+
+# Events that change data; opening or closing a file (e.g. taking the curation lock) does not
+WATCHER_EVENT_TYPES = ("created", "deleted", "moved", "modified")
+
+# Function to check whether a path is a file the app writes itself, whose changes must not refresh the dashboards
+def _is_own_file(path):
+    return path.endswith(".tmp") or os.path.basename(path) in (CURATION_LOCK_NAME, SAMPLE_INDEX_NAME, PARAMS_STORE_NAME)
+
+# Function to react to filesystem events in a watched path
+class _WatchEventHandler(FileSystemEventHandler):
+    def on_any_event(self, event):
+        # A folder is reported modified whenever a file in it is created, deleted or moved, which has its own event
+        if event.event_type not in WATCHER_EVENT_TYPES or (event.is_directory and event.event_type == "modified"):
+            return
+        for path in (event.src_path, getattr(event, "dest_path", "")):
+            if path and not _is_own_file(os.fsdecode(path)):
+                _invalidate_watched_path(os.fsdecode(path))
+
+# Function to start watching a project's data path and backend folder, returning whether both are watched
+def watch_project(data_path, backend_project_path, mode=WATCHER_MODE):
+    global _watch_observer
+    if mode not in ("native", "polling"):
+        return False
+    if Observer is None:
+        print("Warning: watchdog is not installed, falling back to checking modification times")
+        return False
+
+    with _watch_lock:
+        if _watch_observer is None:
+            _watch_observer = Observer() if mode == "native" else PollingObserver(timeout=WATCHER_POLL_SECONDS)
+            _watch_observer.daemon = True
+            _watch_observer.start()
+
+        for path, kind in ((data_path, "data"), (backend_project_path, "backend")):
+            path = _normalize_data_path(path)
+            if path in _watched_paths:
+                continue
+            try:
+                _watch_observer.schedule(_WatchEventHandler(), path, recursive=True)
+            except OSError as e:
+                # e.g. the inotify watch limit was reached, so this path keeps being checked by mtime
+                print(f"Warning: unable to watch {path}: {e}")
+                return False
+            _watched_paths[path] = kind
+            _watch_generations.setdefault(path, 0)
+            _watch_started[path] = time.time()
+    return True
+
+# Function to find the watched path that contains a path, if the watcher is running
+def _get_watched_root(path):
+    if _watch_observer is None or not _watch_observer.is_alive():
+        return None
+    for watched_path in list(_watched_paths):
+        if path == watched_path or path.startswith(watched_path + os.sep):
+            return watched_path
+    return None
+
+# Function to check whether the caches of a path are kept up to date by the watcher
+def is_watched(path):
+    return _get_watched_root(_normalize_data_path(path)) is not None
+
+# Function to check whether the watcher has kept the caches of a path up to date since a given time. State checked
+# before the path was watched (e.g. a sample index persisted before a restart) may miss changes and is checked again.
+def is_watched_since(path, checked):
+    watched_path = _get_watched_root(_normalize_data_path(path))
+    return watched_path is not None and checked >= _watch_started[watched_path]
+
+# Function to get the generation of the watched path containing a path, or None if it is not watched. Comparing it
+# before and after a scan tells whether an event arrived mid-scan, in which case the result must not be cached.
+def _get_path_generation(path):
+    watched_path = _get_watched_root(_normalize_data_path(path))
+    if watched_path is None:
+        return None
+    with _watch_lock:
+        return _watch_generations.get(watched_path, 0)
+
+# Function to get the combined generation of several watched paths, which changes whenever any of them changes
+def get_watch_generation(paths):
+    with _watch_lock:
+        return sum(_watch_generations.get(_normalize_data_path(path), 0) for path in paths)
+
+# Function to drop the cached state affected by a change to one path
+def _invalidate_watched_path(path):
+    path = os.path.normpath(path)
+    watched_path = _get_watched_root(path)
+    if watched_path is None:
+        return
+
+    if _watched_paths[watched_path] == "data":
+        parts = [] if path == watched_path else os.path.relpath(path, watched_path).split(os.sep)
+
+        # A sample folder was added, removed or renamed, so the data path is re-listed
+        if len(parts) <= 1:
+            with _sample_folders_lock:
+                _sample_folders_cache.pop(watched_path, None)
+            with _sample_index_lock:
+                if watched_path in _sample_indexes:
+                    _sample_indexes[watched_path]["data_mtime_ns"] = None
+
+        # Anything written inside a sample folder means its index entry is rescanned
+        if parts:
+            with _sample_index_lock:
+                sample_index = _sample_indexes.get(watched_path)
+                if sample_index and sample_index["samples"].get(parts[0]) is not None:
+                    sample_index["samples"][parts[0]] = None
+                    sample_index["dirty"] = True
+
+        if path.endswith(".params.txt"):
+            with _params_lock:
+                _params_file_cache.pop(path, None)
+    else:
+        with _project_stats_lock:
+            for summary_path in [summary_path for summary_path in _project_stats_cache if summary_path.startswith(watched_path + os.sep)]:
+                del _project_stats_cache[summary_path]
+
+    with _watch_lock:
+        _watch_generations[watched_path] = _watch_generations.get(watched_path, 0) + 1
 
 ############################
 ### tracker_dashboard.py ###
 ############################
 
+# The sample folders of each data path are cached until the mtime of the data path changes, which happens
+# whenever a sample folder is added, removed or renamed
+_sample_folders_cache = {}  # data path -> (mtime_ns, sorted sample folders)
+_sample_folders_lock = threading.Lock()
+
+# Function to stream the sample folders of a data path, reusing the cached listing if the data path is unchanged
+def _scan_sample_folders(directory):
+    directory_key = _normalize_data_path(directory)
+    with _sample_folders_lock:
+        cached = _sample_folders_cache.get(directory_key)
+    if cached and is_watched(directory_key):
+        return cached[1]
+    directory_mtime_ns = os.stat(directory_key).st_mtime_ns
+    if cached and cached[0] == directory_mtime_ns:
+        return cached[1]
+
+    generation = _get_path_generation(directory_key)
+    with os.scandir(directory_key) as entries:
+        sample_folders = tuple(sorted(entry.name for entry in entries if entry.is_dir()))
+    if generation == _get_path_generation(directory_key):
+        with _sample_folders_lock:
+            _sample_folders_cache[directory_key] = (directory_mtime_ns, sample_folders)
+    return sample_folders
+
 # Function to extract and sort the sample folders from the filepath
+@timed()
 def get_folders(directory):
-    return sorted(
-        (entry.name for entry in os.scandir(directory) if entry.is_dir())
-    )
+    return list(_scan_sample_folders(directory))
     
 # Function to generate the output folder locations, prior to writing to them
 def generate_output_folders(output_directory, project):
@@ -298,36 +1866,290 @@ def generate_output_folders(output_directory, project):
     # Create the output directory for this project
     os.makedirs(os.path.join(output_directory, project), exist_ok=True)
 
-# Function to export the curated solution (UNNESTED VERSION)
-def export(sample, base_sample_directory, output_directory, project, solution = "optimal"):
-    #Overwrite existing solution if it exists
-    if os.path.exists(os.path.join(output_directory, project, sample)):
-        shutil.rmtree(os.path.join(output_directory, project, sample))
-    os.makedirs(os.path.join(output_directory, project, sample), exist_ok=True)
+# Export strategies, from cheapest to most expensive:
+# - "hardlink": link the exported files to the ichorCNA output (same filesystem only, no extra disk usage)
+# - "reflink": share the file extents (FICLONE) or copy in-kernel (copy_file_range) where the filesystem supports it
+# - "copy": plain copy through a large userspace buffer
+# Each strategy falls back to the next one when it is not supported for a given file.
+EXPORT_STRATEGIES = ["copy", "reflink", "hardlink"]
+EXPORT_STRATEGY = os.environ.get("ICHORCURATE_EXPORT_STRATEGY", "copy").lower()
+if EXPORT_STRATEGY not in EXPORT_STRATEGIES:
+    print(f"Warning: unknown export strategy '{EXPORT_STRATEGY}' in ICHORCURATE_EXPORT_STRATEGY, using 'copy' (expected one of {', '.join(EXPORT_STRATEGIES)})")
+    EXPORT_STRATEGY = "copy"
+EXPORT_COPY_BUFFER_BYTES = 16 * 1024 * 1024
+_FICLONE = 0x40049409  # Linux ioctl number for cloning a file's extents
+
+# Function to copy a file through a large buffer
+def _buffered_copy(src, dst):
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        shutil.copyfileobj(fsrc, fdst, EXPORT_COPY_BUFFER_BYTES)
+
+# Function to copy a file without moving the data through userspace, returning the mechanism used
+def _reflink_copy(src, dst):
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        # Try to share the extents of the source file (btrfs, XFS, ...)
+        if fcntl is not None:
+            try:
+                fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+                return "reflink"
+            except OSError:
+                pass
+
+        # Otherwise let the kernel (or the NFS server) do the copy
+        if not hasattr(os, "copy_file_range"):
+            raise OSError("copy_file_range is not available on this platform")
+        remaining = os.fstat(fsrc.fileno()).st_size
+        while remaining > 0:
+            copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), min(remaining, 1 << 30))
+            if copied == 0:
+                raise OSError(f"copy_file_range stopped early copying {src}")
+            remaining -= copied
+    return "copy_file_range"
+
+# Function to place a single exported file, returning the strategy that was actually used
+def export_file(src, dst, strategy=EXPORT_STRATEGY):
+    if strategy not in EXPORT_STRATEGIES:
+        raise ValueError(f"Unknown export strategy '{strategy}', expected one of {', '.join(EXPORT_STRATEGIES)}")
+    if os.path.lexists(dst):
+        os.remove(dst)
+
+    if strategy == "hardlink":
+        try:
+            os.link(src, dst)
+            return "hardlink"
+        except OSError:
+            strategy = "reflink"  # Typically the output path is on another filesystem
+
+    if strategy == "reflink":
+        try:
+            return _reflink_copy(src, dst)
+        except OSError:
+            pass  # The partially written destination is truncated by the buffered copy
+
+    _buffered_copy(src, dst)
+    return "copy"
+
+# Each exported sample folder carries a manifest of what was exported, so re-exports only touch what changed
+EXPORT_MANIFEST_NAME = ".ichorcurate_manifest.json"
+EXPORT_PERMISSIONS = stat.S_IRWXU | stat.S_IRWXG # 770 permissions
+
+# Function to compute the SHA-256 of a file with chunked reads
+def hash_file(path, chunk_size=EXPORT_COPY_BUFFER_BYTES):
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+# Function to list what exporting a solution produces, as ({path relative to the export folder: source path}, {relative folders})
+def get_solution_export_plan(sample, base_sample_directory, solution = "optimal"):
+    export_plan = {}
+    export_directories = set()
 
-    # Copy the curated solution to the output directory
     for root, dirs, files in os.walk(base_sample_directory + sample):
 
-        #Copy over the genome-wide plot for the selected solution
+        #Export the genome-wide plot for the selected solution
         for file in files:
 
             # The "solution" input either contains the curated solution name, 
             # or the string "optimal". Here we check through all the files in 
             # the directory to find the one that matches the solution name
             if solution in file:
-                shutil.copy(os.path.join(root, file), os.path.join(output_directory, project, sample))
+                export_plan[file] = os.path.join(root, file)
 
-        #Copy over the rest of the data for that solution
+        #Export the rest of the data for that solution, keeping its folder structure
         for directory in dirs:
             if solution.replace("-", "_") in directory:
-                shutil.copytree(os.path.join(root, directory), os.path.join(os.path.join(output_directory, project, sample), directory))
+                for solution_root, _, solution_files in os.walk(os.path.join(root, directory)):
+                    relative_root = os.path.normpath(os.path.join(directory, os.path.relpath(solution_root, os.path.join(root, directory))))
+                    export_directories.add(relative_root)
+                    for file in solution_files:
+                        export_plan[os.path.join(relative_root, file)] = os.path.join(solution_root, file)
 
-    # Set permissions for all files and folders in the copied directory
-    for dir_root, dirs, dir_files in os.walk(os.path.join(output_directory, project, sample)):
-        for dir in dirs:
-            os.chmod(os.path.join(dir_root, dir), stat.S_IRWXU | stat.S_IRWXG) # 770 permissions
+    return export_plan, export_directories
+
+# Function to load the manifest of a previous export, if there is a usable one
+def load_export_manifest(sample_output_directory):
+    try:
+        with open(os.path.join(sample_output_directory, EXPORT_MANIFEST_NAME), "r") as f:
+            manifest = json.load(f)
+        return manifest if isinstance(manifest.get("files"), dict) else None
+    except (FileNotFoundError, ValueError, AttributeError):
+        return None
+
+# Function to check whether a file is a manifest that another export of the same sample is still writing
+def _is_manifest_temp_file(relative_path):
+    return relative_path.endswith(".tmp") and relative_path.startswith((f"{EXPORT_MANIFEST_NAME}.", f"{CHECKSUM_MANIFEST_NAME}."))
+
+# Function to write the manifest of an export
+def write_export_manifest(sample_output_directory, manifest):
+    manifest_path = os.path.join(sample_output_directory, EXPORT_MANIFEST_NAME)
+    temp_path = f"{manifest_path}.{uuid.uuid4().hex}.tmp"  # Unique, as another session may export the same sample
+    with open(temp_path, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(temp_path, manifest_path)
+    os.chmod(manifest_path, EXPORT_PERMISSIONS)
+
+# Function to set the export permissions on a path, only if they differ
+def _ensure_export_permissions(path, path_stat=None):
+    path_stat = path_stat or os.stat(path)
+    if stat.S_IMODE(path_stat.st_mode) != EXPORT_PERMISSIONS:
+        os.chmod(path, EXPORT_PERMISSIONS)
+
+# Function to export the curated solution (UNNESTED VERSION), returning what happened to each exported file.
+# Files that are unchanged since the last export (according to its manifest) are skipped, files that no longer
+# belong to the solution are deleted, and only the remaining files are copied.
+@timed()
+def export(sample, base_sample_directory, output_directory, project, solution = "optimal", strategy = EXPORT_STRATEGY, hash_files = False):
+    sample_output_directory = os.path.join(output_directory, project, sample)
+    export_plan, export_directories = get_solution_export_plan(sample, base_sample_directory, solution)
+    previous_manifest = load_export_manifest(sample_output_directory) or {"files": {}}
+    manifest = {"sample": sample, "solution": solution, "source": base_sample_directory + sample, "files": {}}
+    file_strategies = {}
+
+    os.makedirs(sample_output_directory, exist_ok=True)
+
+    # Remove everything from a previous export that is not part of this solution
+    for dir_root, dirs, dir_files in os.walk(sample_output_directory, topdown=False):
         for file in dir_files:
-            os.chmod(os.path.join(dir_root, file), stat.S_IRWXU | stat.S_IRWXG) # 770 permissions
+            relative_path = os.path.relpath(os.path.join(dir_root, file), sample_output_directory)
+            if relative_path not in export_plan and relative_path not in (EXPORT_MANIFEST_NAME, CHECKSUM_MANIFEST_NAME) and not _is_manifest_temp_file(relative_path):
+                os.remove(os.path.join(dir_root, file))
+                file_strategies[relative_path] = "deleted"
+        for dir in dirs:
+            if os.path.relpath(os.path.join(dir_root, dir), sample_output_directory) not in export_directories:
+                if os.path.islink(os.path.join(dir_root, dir)):
+                    os.remove(os.path.join(dir_root, dir))
+                else:
+                    shutil.rmtree(os.path.join(dir_root, dir))
+
+    # Recreate the folder structure of the solution
+    for relative_directory in sorted(export_directories):
+        os.makedirs(os.path.join(sample_output_directory, relative_directory), exist_ok=True)
+        _ensure_export_permissions(os.path.join(sample_output_directory, relative_directory))
+
+    # Copy over only the files that differ from the previous export
+    for relative_path, source_path in sorted(export_plan.items()):
+        destination_path = os.path.join(sample_output_directory, relative_path)
+        source_stat = os.stat(source_path)
+        entry = {"source": source_path, "size": source_stat.st_size, "mtime_ns": source_stat.st_mtime_ns}
+        previous_entry = previous_manifest["files"].get(relative_path, {})
+
+        try:
+            destination_stat = os.stat(destination_path)
+        except FileNotFoundError:
+            destination_stat = None
+
+        # A file is unchanged if it still comes from the same source, with the same size and either the same
+        # mtime or, when hashes were recorded, the same content
+        unchanged = (
+            destination_stat is not None
+            and destination_stat.st_size == source_stat.st_size
+            and previous_entry.get("source") == source_path
+            and previous_entry.get("size") == source_stat.st_size
+            and (previous_entry.get("strategy") == "hardlink") == (strategy == "hardlink")
+        )
+        if unchanged and previous_entry.get("mtime_ns") != source_stat.st_mtime_ns:
+            unchanged = hash_files and previous_entry.get("sha256") is not None and previous_entry["sha256"] == hash_file(source_path)
+
+        if unchanged:
+            entry["strategy"] = previous_entry.get("strategy", "copy")
+            file_strategies[relative_path] = "unchanged"
+        else:
+            entry["strategy"] = export_file(source_path, destination_path, strategy)
+            file_strategies[relative_path] = entry["strategy"]
+            destination_stat = None
+
+        if hash_files:
+            entry["sha256"] = previous_entry.get("sha256") if unchanged and previous_entry.get("sha256") else hash_file(source_path)
+
+        # Hardlinked files share their permissions with the ichorCNA output, so leave those untouched
+        if entry["strategy"] != "hardlink":
+            _ensure_export_permissions(destination_path, destination_stat)
+
+        manifest["files"][relative_path] = entry
+
+    # The checksums of a previous verification only hold while every exported file is unchanged
+    if any(used_strategy != "unchanged" for used_strategy in file_strategies.values()):
+        try:
+            os.remove(os.path.join(sample_output_directory, CHECKSUM_MANIFEST_NAME))
+        except FileNotFoundError:
+            pass
+
+    manifest["exported"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    write_export_manifest(sample_output_directory, manifest)
+
+    return file_strategies
+
+# Exports can be verified by hashing every exported file and its source on a pool of threads (hashlib releases the
+# GIL while hashing large chunks). The expected checksums are written next to the export in sha256sum format, so
+# they can also be checked later with `sha256sum -c checksums.sha256`.
+CHECKSUM_MANIFEST_NAME = "checksums.sha256"
+VERIFY_WORKERS = int(os.environ.get("ICHORCURATE_VERIFY_WORKERS", 8))
+
+# Function to get the SHA-256 of a source file, reusing the one recorded by a hashed export if the file is unchanged
+def _get_source_checksum(source_path, manifest_entry):
+    if manifest_entry.get("sha256"):
+        source_stat = os.stat(source_path)
+        if manifest_entry.get("size") == source_stat.st_size and manifest_entry.get("mtime_ns") == source_stat.st_mtime_ns:
+            return manifest_entry["sha256"]
+    return hash_file(source_path)
+
+# Function to compare an exported sample with its source, writing its checksum manifest and returning
+# {"verified": number of matching files, "mismatched": [relative paths], "missing": [relative paths]}
+@timed()
+def verify_export(sample, base_sample_directory, output_directory, project, solution = "optimal", executor = None):
+    sample_output_directory = os.path.join(output_directory, project, sample)
+    export_plan, _ = get_solution_export_plan(sample, base_sample_directory, solution)
+    manifest = load_export_manifest(sample_output_directory) or {"files": {}}
+    verification = {"verified": 0, "mismatched": [], "missing": []}
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(max_workers=max(1, VERIFY_WORKERS), thread_name_prefix="ichorCurate-verify")
+    try:
+        # Hash every source and destination concurrently
+        futures = {}
+        for relative_path, source_path in export_plan.items():
+            destination_path = os.path.join(sample_output_directory, relative_path)
+            try:
+                destination_stat = os.stat(destination_path)
+            except FileNotFoundError:
+                verification["missing"].append(relative_path)
+                continue
+            source_future = executor.submit(_get_source_checksum, source_path, manifest["files"].get(relative_path, {}))
+
+            # A hardlinked file is its source, so it only needs to be hashed once
+            source_stat = os.stat(source_path)
+            if (destination_stat.st_dev, destination_stat.st_ino) == (source_stat.st_dev, source_stat.st_ino):
+                destination_future = source_future
+            else:
+                destination_future = executor.submit(hash_file, destination_path)
+            futures[relative_path] = (source_future, destination_future)
+
+        checksums = {}
+        for relative_path, (source_future, destination_future) in futures.items():
+            checksums[relative_path] = source_future.result()
+            if destination_future.result() == checksums[relative_path]:
+                verification["verified"] += 1
+            else:
+                verification["mismatched"].append(relative_path)
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+    # Record the expected checksums of the source files
+    checksum_path = os.path.join(sample_output_directory, CHECKSUM_MANIFEST_NAME)
+    temp_path = f"{checksum_path}.{uuid.uuid4().hex}.tmp"
+    with open(temp_path, "w") as f:
+        for relative_path in sorted(checksums):
+            f.write(f"{checksums[relative_path]}  {relative_path}\n")
+    os.replace(temp_path, checksum_path)
+    os.chmod(checksum_path, EXPORT_PERMISSIONS)
+
+    verification["mismatched"].sort()
+    verification["missing"].sort()
+    return verification
 
 # # Function to export the curated solution (NESTED VERSION)
 # def export(sample, base_sample_directory, output_directory, solution = "optimal"):
@@ -364,39 +2186,251 @@ def export(sample, base_sample_directory, output_directory, project, solution =
 #                 if solution.replace("-", "_") in directory:
 #                     shutil.copytree(os.path.join(root, directory), os.path.join(os.path.join(output_directory, sample), directory))
 
-# Function to get the tumor fraction and ploidy from the params file for a selected solution
-def get_tfx_and_ploidy(sample, sample_directory, match):
+####################
+### Params Table ###
+####################
+# The params.txt of every (sample, solution) is parsed once and kept in memory, invalidated per file by mtime and
+# size. The dashboard rows read single entries, while the summary reads a project-wide frame built in one parallel pass.
+PARAMS_TABLE_WORKERS = int(os.environ.get("ICHORCURATE_PARAMS_WORKERS", 16))
+PARAMS_TABLE_INDEX_COLUMNS = ["sample", "folder", "n", "p", "params_file", "mtime_ns"]
 
-    # Get the path to the params file
-    sample_folder = os.path.join(sample_directory + sample)
-    params_file_name = None
-
-    for subfolder in os.listdir(sample_folder):
-        #Select the folder of the solution that matches the selected solution
-        if subfolder.endswith(f"n{match.group(1)}_p{match.group(2)}"):
-            selected_solution_folder = os.path.join(sample_folder, subfolder)
-            # Construct the expected params file name
-            params_file_name = f"{sample}.params.txt"
-            # Construct the path to params.txt
-            potential_params_file = os.path.join(selected_solution_folder, params_file_name)
-            if os.path.isfile(potential_params_file):
-                params_file_path = potential_params_file
-                break
+_params_file_cache = {}  # params file path -> (mtime_ns, size, parsed params)
+_params_tables = {}  # data path -> (signature of the files it was built from, frame)
+_params_lock = threading.Lock()
 
-    # Open the params files
+# Function to parse an ichorCNA params file: the header/values table on the first two lines, then "key:<tab>value" lines
+def parse_params_file(params_file_path):
     with open(params_file_path, "r") as file:
-        lines = file.readlines()
+        lines = file.read().splitlines()
+
+    header = lines[0].strip().split("\t")
+    values = lines[1].strip().split("\t")
+    params = dict(zip(header, values))
+
+    # The tumor fraction and ploidy are always the second and third columns
+    params["tumor_fraction"] = values[1]
+    params["ploidy"] = values[2]
+
+    for line in lines[2:]:
+        parts = line.split("\t")
+        if len(parts) >= 2 and parts[0].strip():
+            params[parts[0].strip().rstrip(":")] = "\t".join(parts[1:]).strip()
+
+    return params
+
+# Function to read a params file, reparsing it only if it changed since it was last read
+@timed()
+def read_params_file(params_file_path):
+    with _params_lock:
+        cached = _params_file_cache.get(params_file_path)
+    if cached and is_watched(params_file_path):
+        return cached[2]
+    params_stat = os.stat(params_file_path)
+    if cached and cached[0] == params_stat.st_mtime_ns and cached[1] == params_stat.st_size:
+        return cached[2]
+
+    generation = _get_path_generation(params_file_path)
+    params = parse_params_file(params_file_path)
+    if generation == _get_path_generation(params_file_path):
+        with _params_lock:
+            _params_file_cache[params_file_path] = (params_stat.st_mtime_ns, params_stat.st_size, params)
+    return params
+
+# Function to collect the params rows of one sample, one per solution folder with a params file
+def _get_sample_params_rows(sample_directory, sample):
+    rows = []
+    for solution in get_sample_entry(sample_directory, sample)["solutions"]:
+        if solution["params_file"]:
+            try:
+                params = read_params_file(solution["params_file"])
+                cached = _params_file_cache.get(solution["params_file"])  # Not cached if the file changed while it was read
+                mtime_ns = cached[0] if cached else os.stat(solution["params_file"]).st_mtime_ns
+            except (OSError, IndexError) as e:
+                print(f"Warning: unable to read {solution['params_file']}: {e}")
+                continue
+            row = {"sample": sample, "folder": solution["folder"], "n": solution["n"], "p": solution["p"], "params_file": solution["params_file"], "mtime_ns": mtime_ns}
+            row.update(params)
+            rows.append(row)
+    return rows
+
+# Function to build the params table of a project (or a subset of its samples), one row per (sample, solution)
+@timed()
+def load_params_table(sample_directory, sample_folders=None, max_workers=PARAMS_TABLE_WORKERS):
+    import pandas as pd
+
+    whole_project = sample_folders is None
+    if whole_project:
+        sample_folders = sorted(load_sample_index(sample_directory)["samples"])
+
+    # Read every sample's params files in parallel, since each read is dominated by filesystem latency
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="ichorCurate-params") as executor:
+        rows = [row for sample_rows in executor.map(lambda sample: _get_sample_params_rows(sample_directory, sample), sample_folders) for row in sample_rows]
+
+    # Reuse the previous frame of the project if none of its files changed
+    signature = tuple((row["params_file"], row["mtime_ns"]) for row in rows)
+    data_path = _normalize_data_path(sample_directory)
+    if whole_project:
+        with _params_lock:
+            cached = _params_tables.get(data_path)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+    params_table = pd.DataFrame(rows)
+    if params_table.empty:
+        params_table = pd.DataFrame(columns=PARAMS_TABLE_INDEX_COLUMNS + ["tumor_fraction", "ploidy"])
+
+    if whole_project:
+        with _params_lock:
+            _params_tables[data_path] = (signature, params_table)
+    return params_table
+
+# Function to look up the tumor fraction and ploidy of each (sample, n, p) in a params table
+def get_tfx_and_ploidy_lookup(params_table):
+    lookup = {}
+    for sample, n_value, p_value, tumor_fraction, ploidy in params_table[["sample", "n", "p", "tumor_fraction", "ploidy"]].itertuples(index=False):
+        lookup.setdefault((sample, n_value, p_value), (tumor_fraction, ploidy))  # The first folder wins, like get_tfx_and_ploidy
+    return lookup
 
-    # Extract the tfx and ploidy
-    tumor_fraction = lines[1].strip().split("\t")[1]
-    ploidy = lines[1].strip().split("\t")[2]
+# Function to get the tumor fraction and ploidy from the params file for a selected solution
+@timed()
+def get_tfx_and_ploidy(sample, sample_directory, match):
 
-    return tumor_fraction, ploidy
+    # Get the path to the params file of the solution that matches the selected solution
+    params_file_path = None
+    for solution in get_sample_entry(sample_directory, sample)["solutions"]:
+        if solution["folder"].endswith(f"n{match.group(1)}_p{match.group(2)}") and solution["params_file"]:
+            params_file_path = solution["params_file"]
+            break
+
+    # Read the params file (cached until it changes) and extract the tfx and ploidy, or "NA" if the solution has none
+    if params_file_path is None:
+        return "NA", "NA"
+    try:
+        params = read_params_file(params_file_path)
+    except (OSError, IndexError) as e:
+        print(f"Warning: unable to read {params_file_path}: {e}")
+        return "NA", "NA"
+    return params["tumor_fraction"], params["ploidy"]
+
+# The params of every solution of a project are also kept as a typed Arrow table in the backend folder, so cohort
+# analyses can read them without walking the data path. The store is refreshed incrementally: only params files
+# whose mtime or size changed since it was written are parsed again.
+PARAMS_STORE_NAME = "params.parquet"
+PARAMS_STORE_INDEX_COLUMNS = ["sample", "folder", "n", "p", "params_file"]
+PARAMS_STORE_FIELDS = {  # params key -> (column, type)
+    "tumor_fraction": ("tumor_fraction", "float64"),
+    "ploidy": ("ploidy", "float64"),
+    "Subclone Fraction": ("subclone_fraction", "float64"),
+    "Fraction Genome Subclonal": ("fraction_genome_subclonal", "float64"),
+    "Fraction CNA Subclonal": ("fraction_cna_subclonal", "float64"),
+    "Gender": ("gender", "string"),
+    "Gamma Rate Init": ("gamma_rate_init", "float64"),
+    "GC-Map correction MAD": ("gc_map_mad", "float64"),
+    "Loglik": ("loglik", "float64"),
+}
+
+_params_stores = {}  # store path -> Arrow table last read or written
+
+# Function to get the schema of the params store
+def _get_params_store_schema():
+    import pyarrow as pa
+
+    fields = [(column, pa.string()) for column in PARAMS_STORE_INDEX_COLUMNS] + [("mtime_ns", pa.int64()), ("size", pa.int64())]
+    fields += [(column, pa.float64() if column_type == "float64" else pa.string()) for column, column_type in PARAMS_STORE_FIELDS.values()]
+    return pa.schema(fields)
+
+# Function to convert a params value to a float, or None if it is missing or not a number (e.g. "NA")
+def _params_value_to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+# Function to read the previous params store of a project, from memory or from its Parquet file
+def _read_params_store(store_path, schema):
+    import pyarrow.parquet as pq
+
+    with _params_lock:
+        store = _params_stores.get(store_path)
+    if store is None and os.path.exists(store_path):
+        try:
+            store = pq.read_table(store_path)
+        except Exception as e:
+            print(f"Warning: ignoring unreadable params store {store_path}: {e}")
+    if store is not None and not store.schema.equals(schema):
+        store = None  # Written with different columns, so rebuild it
+    return store
+
+# Function to get the store row of a solution, or the index of its row in the previous store if its params file is unchanged
+def _get_params_store_row(sample, solution, stored_files):
+    params_file = solution["params_file"]
+    try:
+        params_stat = os.stat(params_file)
+        stored = stored_files.get(params_file)
+        if stored and stored[0] == params_stat.st_mtime_ns and stored[1] == params_stat.st_size:
+            return stored[2]
+        params = read_params_file(params_file)
+    except (OSError, IndexError) as e:
+        print(f"Warning: unable to read {params_file}: {e}")
+        return None
+
+    row = {"sample": sample, "folder": solution["folder"], "n": solution["n"], "p": solution["p"], "params_file": params_file, "mtime_ns": params_stat.st_mtime_ns, "size": params_stat.st_size}
+    for key, (column, column_type) in PARAMS_STORE_FIELDS.items():
+        row[column] = _params_value_to_float(params.get(key)) if column_type == "float64" else params.get(key)
+    return row
+
+# Function to refresh and return the params store of a project, an Arrow table with one row per (sample, solution),
+# written to <backend>/<project>/params.parquet whenever a params file was added, changed or removed
+@timed()
+def load_params_store(sample_directory, backend_project_path, max_workers=PARAMS_TABLE_WORKERS):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    store_path = os.path.join(backend_project_path, PARAMS_STORE_NAME)
+    schema = _get_params_store_schema()
+    store = _read_params_store(store_path, schema)
+    stored_files = {}
+    if store is not None:
+        for index, (params_file, mtime_ns, size) in enumerate(zip(*(store.column(column).to_pylist() for column in ["params_file", "mtime_ns", "size"]))):
+            stored_files[params_file] = (mtime_ns, size, index)
+
+    # Stat every params file in parallel, parsing only the new and changed ones
+    samples = sorted(load_sample_index(sample_directory)["samples"])
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="ichorCurate-params") as executor:
+        solutions = [
+            (sample, solution)
+            for sample, sample_entry in zip(samples, executor.map(lambda sample: get_sample_entry(sample_directory, sample), samples))
+            for solution in sample_entry["solutions"] if solution["params_file"]
+        ]
+        results = list(executor.map(lambda item: _get_params_store_row(*item, stored_files), solutions))
+    kept_rows = [result for result in results if isinstance(result, int)]
+    new_rows = [result for result in results if isinstance(result, dict)]
+
+    # Rewrite the store only if a solution was added, changed or removed
+    if store is None or new_rows or len(kept_rows) != store.num_rows:
+        parts = [store.take(kept_rows)] if kept_rows else []
+        if new_rows:
+            parts.append(pa.Table.from_pylist(new_rows, schema=schema))
+        store = pa.concat_tables(parts).sort_by([("sample", "ascending"), ("folder", "ascending")]) if parts else schema.empty_table()
+
+        os.makedirs(backend_project_path, exist_ok=True)
+        temp_path = f"{store_path}.{uuid.uuid4().hex}.tmp"
+        pq.write_table(store, temp_path)
+        os.replace(temp_path, store_path)
+
+    with _params_lock:
+        _params_stores[store_path] = store
+    return store
 
 # Function to collect summary information
+@timed()
 def populate_summary(sample_folders, sample_directory, curated_solutions):
     summary = []
 
+    # Read the params of every curated sample in one parallel pass
+    curated_samples = [sample for sample in sample_folders if curated_solutions.get(sample)]
+    tfx_and_ploidy = get_tfx_and_ploidy_lookup(load_params_table(sample_directory, curated_samples))
+
     for sample in sample_folders:
         # Get curated solution from session state
         curated_solution = curated_solutions.get(sample, None)
@@ -409,7 +2443,10 @@ def populate_summary(sample_folders, sample_directory, curated_solutions):
 
             for i in range(num_curations):
                 match = re.search(r"n([\d.]+)-p(\d+)\.pdf$", solutions[i])
-                tumor_fraction, ploidy = get_tfx_and_ploidy(sample, sample_directory, match)
+                if (sample, match.group(1), match.group(2)) in tfx_and_ploidy:
+                    tumor_fraction, ploidy = tfx_and_ploidy[(sample, match.group(1), match.group(2))]
+                else:
+                    tumor_fraction, ploidy = get_tfx_and_ploidy(sample, sample_directory, match)
                 formatted_solution_name = f"Tumor Fraction {tumor_fraction}, Ploidy {ploidy}"
                 summary.append(f"{sample}\t{formatted_solution_name}\t{users[i]}\t{solutions[i]}\t{timestamps[i]}")
         else:
@@ -417,20 +2454,193 @@ def populate_summary(sample_folders, sample_directory, curated_solutions):
 
     return summary
 
+CURATION_SUMMARY_HEADER = "Sample Name\tCuration Status\tUser\tSolution Filename\tCuration Timestamp\n"
+
 # Function to generate a summary file of the curated solutions
+@timed()
 def generate_summary_file(summary, output_directory, project):
-    output_file_path = os.path.join(output_directory, project, "curation_summary.txt")
-    with open(output_file_path, 'w') as file:
-        file.write("Sample Name\tCuration Status\tUser\tSolution Filename\tCuration Timestamp\n")
+    output_file_path = os.path.join(output_directory, project, CURATION_SUMMARY_NAME)
+    temp_path = f"{output_file_path}.{uuid.uuid4().hex}.tmp"
+    with open(temp_path, 'w') as file:
+        file.write(CURATION_SUMMARY_HEADER)
         for line in summary:
             file.write(line + "\n")
+    os.replace(temp_path, output_file_path)
     
 
-# Function to export all samples
-def export_all(sample_folders, curated_solutions, sample_directory, output_directory, project, curated_only=False):
+# Number of samples exported concurrently by export_all
+EXPORT_WORKERS = int(os.environ.get("ICHORCURATE_EXPORT_WORKERS", 8))
+
+# Function to determine which solution to export for each sample: the last curated one, or else ichorCNA's optimal one
+def get_export_jobs(sample_folders, curated_solutions, curated_only=False):
+    export_jobs = {}
     for sample in sample_folders:
-        if sample in curated_solutions:
+        if curated_solutions.get(sample):
             solutions = [entry["solution_pdf"] for entry in curated_solutions[sample].values()]
-            export(sample, sample_directory, output_directory, project, solutions[-1][-11:-4]) # Extract the last solution
+            export_jobs[sample] = solutions[-1][-11:-4] # Extract the last solution
         elif not curated_only:
-            export(sample, sample_directory, output_directory, project)
\ No newline at end of file
+            export_jobs[sample] = "optimal"
+    return export_jobs
+
+# Function to export one sample and, if requested, verify it on the shared hashing pool
+def _export_and_verify(sample, sample_directory, output_directory, project, solution, strategy, hash_files, verify_executor):
+    file_strategies = export(sample, sample_directory, output_directory, project, solution, strategy, hash_files)
+    verification = verify_export(sample, sample_directory, output_directory, project, solution, verify_executor) if verify_executor else None
+    return file_strategies, verification
+
+# Function to export all samples on a bounded worker pool, returning the outcome for each sample as
+# {"error": error message or None, "files": {exported file: strategy used}, "verification": result of verify_export or None}
+@timed()
+def export_all(sample_folders, curated_solutions, sample_directory, output_directory, project, curated_only=False, max_workers=EXPORT_WORKERS, strategy=EXPORT_STRATEGY, hash_files=False, verify=False):
+    # Determine which solution to export for each sample
+    export_jobs = get_export_jobs(sample_folders, curated_solutions, curated_only)
+
+    # Export the samples concurrently, since each export is dominated by filesystem latency. Verification hashes
+    # the files of every sample on one shared pool, so its parallelism does not depend on the size of each sample.
+    export_results = {}
+    verify_executor = ThreadPoolExecutor(max_workers=max(1, VERIFY_WORKERS), thread_name_prefix="ichorCurate-verify") if verify else None
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="ichorCurate-export") as executor:
+        futures = {
+            executor.submit(_export_and_verify, sample, sample_directory, output_directory, project, solution, strategy, hash_files, verify_executor): sample
+            for sample, solution in export_jobs.items()
+        }
+        for future in as_completed(futures):
+            try:
+                file_strategies, verification = future.result()
+                export_results[futures[future]] = {"error": None, "files": file_strategies, "verification": verification}
+            except Exception as e:
+                export_results[futures[future]] = {"error": f"{type(e).__name__}: {e}", "files": {}, "verification": None}
+    if verify_executor:
+        verify_executor.shutdown()
+
+    # Report the results in sample order
+    return {sample: export_results[sample] for sample in export_jobs}
+
+# Archive formats for exporting a whole project as a single file
+ARCHIVE_FORMATS = ["zip", "tar", "tar.gz", "tar.xz"]
+ARCHIVE_INDEX_NAME = "index.tsv"
+ARCHIVE_PLAN_LOOKAHEAD = 64  # Samples whose export plans are gathered ahead of the archive writer
+
+# Function to add a file to an open archive, streaming it in chunks so memory stays bounded
+def _add_to_archive(archive, archive_format, src, arcname):
+    if archive_format == "zip":
+        archive.write(src, arcname)
+    else:
+        archive.add(src, arcname, recursive=False)
+
+# Function to add in-memory text (the summary and index) to an open archive
+def _add_text_to_archive(archive, archive_format, text, arcname):
+    data = text.encode("utf-8")
+    if archive_format == "zip":
+        archive.writestr(arcname, data)
+    else:
+        info = tarfile.TarInfo(arcname)
+        info.size = len(data)
+        info.mtime = time.time()
+        info.mode = 0o660
+        archive.addfile(info, io.BytesIO(data))
+
+# Function to export the selected solution of every sample into a single archive, in one sequential write. The archive
+# holds <project>/<sample>/... like a regular export, plus the curation summary and an index of every archived file.
+# Returns the archive path and the outcome for each sample as {"error": error message or None, "archived": number of archived files}.
+@timed()
+def export_archive(sample_folders, curated_solutions, sample_directory, output_directory, project, archive_format="zip", curated_only=False, max_workers=EXPORT_WORKERS):
+    export_jobs = get_export_jobs(sample_folders, curated_solutions, curated_only)
+    summary = populate_summary(sample_folders, sample_directory, curated_solutions)
+
+    os.makedirs(output_directory, exist_ok=True)
+    archive_path = os.path.join(output_directory, f"{project}.{archive_format}")
+    # Unique, as another session may archive the same project. The index is streamed to its own file so memory
+    # does not grow with the number of archived files.
+    tmp_token = uuid.uuid4().hex
+    tmp_path = f"{archive_path}.{tmp_token}.tmp"
+    index_tmp_path = f"{archive_path}.{tmp_token}.index.tmp"
+
+    export_results = {}
+    try:
+        if archive_format == "zip":
+            # The PDFs are already compressed, so the fastest deflate level is used
+            archive = zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=1)
+        else:
+            compression = archive_format.split(".")[1] if "." in archive_format else ""
+            archive = tarfile.open(tmp_path, f"w:{compression}")
+
+        with archive, open(index_tmp_path, "w") as index_file, ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="ichorCurate-archive") as executor:
+            index_file.write("Sample Name\tSolution\tFile\tSize\tSource\n")
+
+            # Walk the sample folders concurrently a bounded number of samples ahead, while a single writer appends to the archive
+            jobs = iter(export_jobs.items())
+            pending = deque()
+            def plan_next_sample():
+                job = next(jobs, None)
+                if job:
+                    pending.append((job[0], job[1], executor.submit(get_solution_export_plan, job[0], sample_directory, job[1])))
+
+            for _ in range(ARCHIVE_PLAN_LOOKAHEAD):
+                plan_next_sample()
+
+            while pending:
+                sample, solution, future = pending.popleft()
+                plan_next_sample()
+
+                try:
+                    export_plan, _ = future.result()
+                    archived_files = 0
+                    for rel, src in sorted(export_plan.items()):
+                        _add_to_archive(archive, archive_format, src, f"{project}/{sample}/{rel}")
+                        archived_files += 1
+                        index_file.write(f"{sample}\t{solution}\t{sample}/{rel}\t{os.path.getsize(src)}\t{src}\n")
+                    export_results[sample] = {"error": None, "archived": archived_files}
+                except OSError as e:
+                    export_results[sample] = {"error": f"{type(e).__name__}: {e}", "archived": 0}
+
+            _add_text_to_archive(archive, archive_format, CURATION_SUMMARY_HEADER + "".join(line + "\n" for line in summary), f"{project}/{CURATION_SUMMARY_NAME}")
+            index_file.flush()
+            _add_to_archive(archive, archive_format, index_tmp_path, f"{project}/{ARCHIVE_INDEX_NAME}")
+
+        os.replace(tmp_path, archive_path)
+    finally:
+        for path in (tmp_path, index_tmp_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    return archive_path, export_results
+
+# Function to count how many files were exported with each strategy
+def count_export_strategies(file_strategies):
+    strategy_counts = {}
+    for used_strategy in file_strategies.values():
+        strategy_counts[used_strategy] = strategy_counts.get(used_strategy, 0) + 1
+    return ", ".join(f"{count} {used_strategy}" for used_strategy, count in sorted(strategy_counts.items()))
+
+# Function to summarize the per-sample results of a bulk export
+def display_export_results(export_results, destination):
+    failed = {sample: result["error"] for sample, result in export_results.items() if result["error"]}
+    all_file_strategies = {
+        (sample, file): used_strategy
+        for sample, result in export_results.items()
+        for file, used_strategy in result.get("files", {}).items()
+    }
+    archived_files = sum(result.get("archived", 0) for result in export_results.values())
+    st.write(f"{len(export_results) - len(failed)} of {len(export_results)} solutions exported to {destination}")
+    if all_file_strategies:
+        st.write(f"Files exported by strategy: {count_export_strategies(all_file_strategies)}")
+    if archived_files:
+        st.write(f"{archived_files} files archived")
+    for sample, error in failed.items():
+        st.error(f"Export failed for {sample}: {error}")
+
+    # Report the outcome of checksum verification, if it was run
+    verifications = {sample: result["verification"] for sample, result in export_results.items() if result.get("verification")}
+    if verifications:
+        verified_files = sum(verification["verified"] for verification in verifications.values())
+        st.write(f"Checksums verified for {verified_files} files in {len(verifications)} samples")
+        for sample, verification in verifications.items():
+            display_verification(verification, sample)
+
+# Function to report files of an export that failed checksum verification
+def display_verification(verification, sample=None):
+    if verification["mismatched"] or verification["missing"]:
+        st.error(f"Verification failed{f' for {sample}' if sample else ''}: {len(verification['mismatched'])} mismatched ({', '.join(verification['mismatched'][:5])}), {len(verification['missing'])} missing ({', '.join(verification['missing'][:5])})")
+    elif sample is None:
+        st.write(f"Checksums verified for {verification['verified']} files")
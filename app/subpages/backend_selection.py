@@ -12,8 +12,9 @@ This module provides the backend selection functionality to enable app persisten
 import streamlit as st
 
 # Import user modules
-from src.utils import save_backend_path, format_filepath, is_valid_backend, initialize_backend_folder
+from src.utils import timed, save_backend_path, format_filepath, is_valid_backend, initialize_backend_folder
 
+@timed("Backend selection page")
 def display():
     st.title("Backend Selection")
     st.write("Select the backend folder location which will host the app metadata and enable persistence across users and sessions. If you are the first one in your organization to clone the repo you will need to select a new folder location. If someone else in your organization has already set up the backend location, enter that path here.")
@@ -15,8 +15,9 @@ import datetime
 from streamlit_shortcuts import button
 
 # Import user modules
-from src.utils import get_pdf_first_page_image, extract_chromosome_number, promote_default_pdf, select_chromosomes, display_chromosome_plots
+from src.utils import timed, load_curated_solutions, record_curation, display_pdf_image, display_copy_number_plot, get_solution_details_folder, promote_default_pdf, RANKING_CRITERIA, RANKING_DEFAULT_CRITERIA, load_sample_index, get_sample_entry, SAMPLE_INDEX_NAME, select_chromosomes, display_chromosome_plots, display_solution_thumbnails, get_prefetch_paths, prefetch_pdf_images
 
+@timed("Curation page")
 def display():
     """
     Main wrapper for the curation page display.
@@ -34,28 +35,23 @@ def display():
         ############################
         sample_name = st.session_state[project]["selected_sample"]
 
+        # Merge in the curations other sessions recorded since the last rerun
+        load_curated_solutions(st.session_state.backend, project)
+
         # Specify the directory containing the genome-wdie PDFs
         genome_wide_directory = os.path.join(st.session_state.selected_folder, sample_name)
         
-        # Load the PDFs containing "genomeWide_n" and ending with ".pdf"
-        genome_wide_pdf_files = sorted([
-            f for f in os.listdir(genome_wide_directory)
-            if "genomeWide_n" in f and f.endswith(".pdf")
-        ])
-
-        # Identify the default solution, and place this at the front of the list
-        sorted_genome_wide_pdf_files = promote_default_pdf(genome_wide_directory, genome_wide_pdf_files)
-
-        # Loop through the directory and load and store the PDFs names of the per-chromosome plots
-        for solution, _, files in os.walk(genome_wide_directory):
-            # Extract the chromosome files
-            chromosome_pdf_files = sorted([
-                f for f in files
-                if "CNA_chrchr" in f and f.endswith(".pdf")
-            ], key=extract_chromosome_number)
-
-            if chromosome_pdf_files:
-                continue #Since all the chromosome plots have the same file name, we only need to find one solution to create the list
+        # Load the PDFs containing "genomeWide_n" and ending with ".pdf", and the per-chromosome plot names, from the sample index
+        load_sample_index(st.session_state.selected_folder, os.path.join(st.session_state.backend, project, SAMPLE_INDEX_NAME))
+        sample_entry = get_sample_entry(st.session_state.selected_folder, sample_name)
+        genome_wide_pdf_files = list(sample_entry["genome_wide_pdfs"])
+        chromosome_pdf_files = sample_entry["chromosome_pdfs"]
+
+        # Identify the default solution, and place this at the front of the list, followed by the other solutions ranked by the selected criteria
+        ranking_criteria = st.multiselect(
+            "Rank Solutions By", list(RANKING_CRITERIA), default=list(RANKING_DEFAULT_CRITERIA), format_func=RANKING_CRITERIA.get, key="ranking_criteria",
+            help="Order the solutions after the optimal one by these criteria, in turn. Ploidy plausibility ranks ploidies closest to diploid first")
+        sorted_genome_wide_pdf_files = promote_default_pdf(genome_wide_directory, genome_wide_pdf_files, ranking_criteria)
 
         # State for tracking which PDF is currently displayed
         if sample_name not in st.session_state[project]["visualization"]:
@@ -76,10 +72,25 @@ def display():
         # # Navigation Controls Column
         st.subheader(f"Potential Solutions for Sample: {sample_name}")
 
+        # Toggle for plotting from ichorCNA's copy-number tables, where zooming happens in the browser
+        interactive_plots = st.toggle("Interactive Plots", key="interactive_plots", help="Plot the solutions from their .cna.seg and .seg.txt tables instead of the PDFs. Drag to zoom, double-click to reset. Solutions without tables are still shown as PDFs")
+
         # Toggle for enabling chromosome zoom
         chrom_zoom = False
+        combine_chromosomes = False
         if st.toggle("Enable Chromosome Zoom"):
             chrom_zoom = True
+            combine_chromosomes = st.toggle("Combine Chromosome Plots", help="Show the selected chromosomes as a single image, which loads faster when many are selected")
+
+        # Grid of every solution for this sample, where clicking a thumbnail shows that solution
+        if st.toggle("Show All Solutions") and sorted_genome_wide_pdf_files:
+            optimal_pdf = None
+            if sample_entry["optimal"]:
+                optimal_pdf = next((f for f in sorted_genome_wide_pdf_files if "n{}-p{}".format(*sample_entry["optimal"]) in f), None)
+            selected_index = display_solution_thumbnails(genome_wide_directory, sorted_genome_wide_pdf_files, optimal_pdf, st.session_state[project]["visualization"][sample_name]["pdf_index"])
+            if selected_index is not None:
+                st.session_state[project]["visualization"][sample_name]["pdf_index"] = selected_index
+                st.rerun()
 
         # Display navigation buttons
         col1, col2, col3 = st.columns([1, 2, 1])
@@ -96,15 +107,22 @@ def display():
             current_pdf = sorted_genome_wide_pdf_files[st.session_state[project]["visualization"][sample_name]["pdf_index"]]
             st.session_state[project]["visualization"][sample_name]["current_pdf"] = current_pdf
             file_path = os.path.join(genome_wide_directory, current_pdf)
-            pdf_image = get_pdf_first_page_image(file_path)
 
             #st.subheader(f"Displaying {current_pdf}")
             if st.session_state[project]["visualization"][sample_name]["pdf_index"] == 0:
                 st.subheader("Default Solution")
-            st.image(pdf_image, use_container_width=True)
+            if not (interactive_plots and display_copy_number_plot(genome_wide_directory, get_solution_details_folder(genome_wide_directory, current_pdf), sample_name, key="current_plot")):
+                display_pdf_image(file_path)
             page_index = st.session_state[project]["visualization"][sample_name]["pdf_index"] + 1
             st.write(f"Showing Potential Solution {page_index} of {len(sorted_genome_wide_pdf_files)}")
 
+            # Render the neighbouring solutions and this solution's chromosome plots in the background
+            if "prefetch" not in st.session_state:
+                st.session_state.prefetch = {}
+            if not interactive_plots:
+                prefetch_paths = get_prefetch_paths(genome_wide_directory, sorted_genome_wide_pdf_files, st.session_state[project]["visualization"][sample_name]["pdf_index"], sample_name, chromosome_pdf_files)
+                prefetch_pdf_images(st.session_state.prefetch, (project, sample_name), prefetch_paths)
+
             # Button to set the current PDF as the solution
             with col3:
                 if button("Set as Selected Solution", "Enter", None, hint=True):
@@ -121,7 +139,7 @@ def display():
 
             # Display selected PDFs in horizontal layout
             if selected_chromosomes:
-                display_chromosome_plots(selected_chromosomes, genome_wide_directory, solution_folder_name, sample_name)
+                display_chromosome_plots(selected_chromosomes, genome_wide_directory, solution_folder_name, sample_name, combine_chromosomes, interactive_plots, key="current_chromosome_plot")
         
         
         ###################################
@@ -138,9 +156,10 @@ def display():
 
                 for reference_sample in options:
                     reference_sample, username = reference_sample.split(", ")
-                    solution_path = os.path.join(st.session_state.selected_folder, reference_sample, st.session_state[project]["curated_solutions"][reference_sample][username]["solution_pdf"])
-                    solution_image = get_pdf_first_page_image(solution_path)
-                    st.image(solution_image, use_container_width=True)
+                    reference_pdf = st.session_state[project]["curated_solutions"][reference_sample][username]["solution_pdf"]
+                    reference_directory = os.path.join(st.session_state.selected_folder, reference_sample)
+                    if not (interactive_plots and display_copy_number_plot(reference_directory, get_solution_details_folder(reference_directory, reference_pdf), reference_sample, title=f"{reference_sample} ({username})", key=f"reference_plot_{reference_sample}_{username}")):
+                        display_pdf_image(os.path.join(reference_directory, reference_pdf))
 
         ##########################
         ### Selected Solutions ###
@@ -154,9 +173,9 @@ def display():
             ### Selected Solutions - Genome-Wide ###
             ########################################
             solution_path = os.path.join(genome_wide_directory, st.session_state[project]["visualization"][sample_name]["solution_pdf"])
-            solution_image = get_pdf_first_page_image(solution_path)
             #st.write(f"Solution PDF: {st.session_state.solution_pdf}")
-            st.image(solution_image, use_container_width=True)
+            if not (interactive_plots and display_copy_number_plot(genome_wide_directory, get_solution_details_folder(genome_wide_directory, st.session_state[project]["visualization"][sample_name]["solution_pdf"]), sample_name, key="selected_plot")):
+                display_pdf_image(solution_path)
             
             ###########################################
             ### Selected Solutions - Per-Chromosome ###
@@ -167,7 +186,7 @@ def display():
 
                 # Display selected PDFs in horizontal layout
                 if selected_chromosomes:
-                    display_chromosome_plots(selected_chromosomes, genome_wide_directory, solution_folder_name, sample_name)
+                    display_chromosome_plots(selected_chromosomes, genome_wide_directory, solution_folder_name, sample_name, combine_chromosomes, interactive_plots, key="selected_chromosome_plot")
 
             ###################################
             ### Selected Solutions - Curate ###
@@ -188,6 +207,9 @@ def display():
                     "solution_pdf": st.session_state[project]["visualization"][sample_name]["solution_pdf"],
                     "timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
 
+                # Record the curation in the backend journal
+                record_curation(st.session_state.backend, project, "set", sample_name, st.session_state.username, **st.session_state[project]["curated_solutions"][sample_name][st.session_state.username])
+
                 st.session_state.page = "Tracker Dashboard" # Navigate back to the tracker dashboard
                 st.rerun()  # Refresh the app to load the tracker dashboard page
 
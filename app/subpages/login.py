@@ -11,6 +11,10 @@ This module provides the logic for the entry login page of the ichorCurate app.
 # Import packages
 import streamlit as st
 
+# Import user modules
+from src.utils import timed
+
+@timed("Login page")
 def display():
     st.title("Login Page")
     st.write("Please log in to continue.")
@@ -10,12 +10,12 @@ This module provides the logic for the projects overview page of the ichorCurate
 
 # Import packages
 import streamlit as st
-import yaml
 import os
 
 # Import user modules
-from src.utils import load_config, count_samples, count_curated_samples, get_curating_users, get_latest_update, load_curated_solutions, format_filepath, generate_output_folders
+from src.utils import timed, load_config, save_config, rename_project_curations, get_project_stats, load_curated_solutions, format_filepath, CURATION_SUMMARY_NAME
 
+@timed("Projects overview page")
 def display():
     st.title("Projects Overview")
     config_path = os.path.join(st.session_state.backend, "config.yaml")
@@ -43,6 +43,9 @@ def display():
     with cols[8]:
         st.write("**Delete Project**")
 
+    # Gather the statistics of all projects at once
+    project_stats = get_project_stats(config.get("projects") or {})
+
     # Display a row for each project
     for project_name, project_info in (config.get("projects") or {}).items():
         #Instantiate a separate session state for each project and load in the existing solutions from the summary
@@ -75,19 +78,19 @@ def display():
 
         # Column 4: Number of Samples
         with cols[3]:
-            st.write(count_samples(data_path))
+            st.write(project_stats[project_name]["samples"])
 
         # Column 5: Number of Curated Samples
         with cols[4]:
-            st.write(count_curated_samples(summary_path))
+            st.write(project_stats[project_name]["curated_samples"])
 
         # Column 6: Number of Curated Samples
         with cols[5]:
-            st.write(get_curating_users(summary_path))
+            st.write(project_stats[project_name]["curating_users"])
 
         # Column 7: Latest Update
         with cols[6]:
-            st.write(get_latest_update(summary_path))
+            st.write(project_stats[project_name]["latest_update"])
         
         # Column 8: Edit Project Button
         with cols[7]:
@@ -123,16 +126,14 @@ def display():
                 if st.button("💾 Save", key=f"save_edit_{project_name}"):
                     # Update config
                     if new_project_name != project_name:
-                        #Move summary file
-                        summary_path = os.path.join(st.session_state.backend, new_project_name, "curation_summary.txt")
-                        generate_output_folders(st.session_state.backend, new_project_name)
-                        os.rename(os.path.join(st.session_state.backend, project_name, "curation_summary.txt"), summary_path)
+                        #Move the curations to the new project name
+                        summary_path = os.path.join(st.session_state.backend, new_project_name, CURATION_SUMMARY_NAME)
+                        rename_project_curations(st.session_state.backend, project_name, new_project_name)
                         del config["projects"][project_name]
                     config["projects"][new_project_name] = {"data_path": new_data_path, "summary_path": summary_path, "output_path": new_output_path}
 
-                    # Save updated YAML file
-                    with open(config_path, "w") as file:
-                        yaml.dump(config, file, default_flow_style=False)
+                    # Save updated config
+                    save_config(config_path, config)
 
                     del st.session_state["edit_project"]
                     del st.session_state["edit_data_path"]
@@ -155,9 +156,8 @@ def display():
                     # Remove project from config
                     del config["projects"][project_name]
 
-                    # Save updated YAML file
-                    with open(config_path, "w") as file:
-                        yaml.dump(config, file, default_flow_style=False)
+                    # Save updated config
+                    save_config(config_path, config)
 
                     del st.session_state["delete_confirm"]
                     st.success(f"Project '{project_name}' deleted successfully!")
@@ -174,14 +174,13 @@ def display():
 
         if st.button("Add Project"):
             if new_project_name and new_data_path:
-                new_summary_path = os.path.join(st.session_state.backend, new_project_name, "curation_summary.txt")
+                new_summary_path = os.path.join(st.session_state.backend, new_project_name, CURATION_SUMMARY_NAME)
 
                 # Update config
                 config["projects"][new_project_name] = {"data_path": new_data_path, "summary_path": new_summary_path, "output_path": new_output_path}
 
-                # Save to YAML
-                with open(config_path, "w") as file:
-                    yaml.dump(config, file, default_flow_style=False)
+                # Save updated config
+                save_config(config_path, config)
 
                 st.success(f"Project '{new_project_name}' added!")
                 st.rerun()
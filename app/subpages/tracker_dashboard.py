@@ -12,10 +12,21 @@ This module provides the main logic for the tracker dashboard page of the ichorC
 import streamlit as st
 import os
 import re
+import time
 
 # Import user modules
-from src.utils import get_folders, get_tfx_and_ploidy, populate_summary, generate_summary_file, export, export_all, generate_output_folders
+from src.utils import timed, watch_project, get_watch_generation, WATCHER_REFRESH_SECONDS, submit_background_task, rank_project_solutions, load_params_store, load_curated_solutions, record_curation, compact_curation_journal, CURATION_JOURNAL_COMPACT_EVENTS, CURATION_SUMMARY_NAME, get_folders, load_sample_index, SAMPLE_INDEX_NAME, get_tfx_and_ploidy, populate_summary, generate_summary_file, export, export_all, export_archive, ARCHIVE_FORMATS, display_export_results, display_verification, count_export_strategies, verify_export, generate_output_folders, EXPORT_STRATEGIES, EXPORT_STRATEGY
 
+# Minimum number of seconds between background refreshes of the project's params table
+DASHBOARD_REFRESH_SECONDS = 300
+
+# Rerun the dashboard when the filesystem watcher reports changes to the project, checked in memory without touching the filesystem
+@st.fragment(run_every=WATCHER_REFRESH_SECONDS)
+def refresh_on_changes(project, watched_paths):
+    if get_watch_generation(watched_paths) != st.session_state[project]["watch_generation"]:
+        st.rerun()
+
+@timed("Tracker dashboard page")
 def display():
     st.subheader("Tracker Dashboard")
 
@@ -25,28 +36,64 @@ def display():
 
     sample_folders = get_folders(sample_directory)
 
-    # Generate the summary
-    summary = populate_summary(sample_folders, sample_directory, st.session_state[project]["curated_solutions"])
+    # Bring the sample index of this project up to date, so per-sample lookups avoid listing the sample folders
+    load_sample_index(sample_directory, os.path.join(st.session_state.backend, project, SAMPLE_INDEX_NAME))
 
-    #Generate output folders
-    generate_output_folders(st.session_state.output_path, project)
+    #Generate the backend folder of the project
     generate_output_folders(st.session_state.backend, project)
 
-    #Auto-Log to the backend the summary file
-    generate_summary_file(summary, st.session_state.backend, project)
-
-    # Buttons for exporting curation summary and all curations
+    # Merge in the curations other sessions recorded since the last rerun, and compact the journal in the background once it grows large
+    load_curated_solutions(st.session_state.backend, project)
+    if st.session_state[project]["curation_journal"]["events"] >= CURATION_JOURNAL_COMPACT_EVENTS:
+        submit_background_task(("compact", st.session_state.backend, project), compact_curation_journal, st.session_state.backend, project)
+
+    # Watch the project for new ichorCNA output (if enabled), and refresh this page when it lands
+    watched_paths = [sample_directory, os.path.join(st.session_state.backend, project)]
+    st.session_state[project]["watch_generation"] = get_watch_generation(watched_paths)
+    if watch_project(*watched_paths):
+        refresh_on_changes(project, watched_paths)
+
+    # Periodically (or when the watcher saw changes) refresh and rank the project's params table in the background, so whole-project exports start warm and the curation page starts with ranked solutions,
+    # and bring the params store in the backend folder up to date
+    if (
+        time.time() - st.session_state[project].get("params_refreshed", 0) > DASHBOARD_REFRESH_SECONDS
+        or st.session_state[project].get("params_generation") != st.session_state[project]["watch_generation"]
+    ):
+        st.session_state[project]["params_refreshed"] = time.time()
+        st.session_state[project]["params_generation"] = st.session_state[project]["watch_generation"]
+        submit_background_task(("params", sample_directory), rank_project_solutions, sample_directory)
+        submit_background_task(("params_store", sample_directory), load_params_store, sample_directory, os.path.join(st.session_state.backend, project))
+
+    # Select how exported files are written to the output path
+    export_strategy = st.selectbox(
+        "Export Strategy", EXPORT_STRATEGIES, index=EXPORT_STRATEGIES.index(EXPORT_STRATEGY), key=f"export_strategy_{project}",
+        help="'hardlink' links to the ichorCNA output when it shares a filesystem with the output path, 'reflink' uses copy-on-write clones or in-kernel copies where supported, and 'copy' always duplicates the data. Unsupported strategies fall back to the next one.")
+
+    verify_exports = st.checkbox("Verify Exports", key=f"verify_exports_{project}",
+        help="After exporting, compare the checksums of the exported files with the ichorCNA output, and write a checksums.sha256 file into each exported sample folder.")
+
+    # Buttons for exporting curation summary and all curations (whole-project work only runs when these are pressed)
     if st.button("Export Curation Summary"):
+        summary = populate_summary(sample_folders, sample_directory, st.session_state[project]["curated_solutions"])
+        generate_output_folders(st.session_state.output_path, project)
         generate_summary_file(summary, st.session_state.output_path, project)
-        st.write(f"Summary file generated at {os.path.join(st.session_state.output_path, project, 'curation_summary.txt')}")
+        st.write(f"Summary file generated at {os.path.join(st.session_state.output_path, project, CURATION_SUMMARY_NAME)}")
 
     if st.button("Export All Samples"):
-        export_all(sample_folders, st.session_state[project]["curated_solutions"], sample_directory, st.session_state.output_path, project)
-        st.write(f"All solutions exported to {os.path.join(st.session_state.output_path, project)}")
+        export_results = export_all(sample_folders, st.session_state[project]["curated_solutions"], sample_directory, st.session_state.output_path, project, strategy=export_strategy, verify=verify_exports)
+        display_export_results(export_results, os.path.join(st.session_state.output_path, project))
 
     if st.button("Export All Curated Samples"):
-        export_all(sample_folders, st.session_state[project]["curated_solutions"], sample_directory, st.session_state.output_path, project, curated_only=True)
-        st.write(f"All curated solutions exported to {os.path.join(st.session_state.output_path, project)}")
+        export_results = export_all(sample_folders, st.session_state[project]["curated_solutions"], sample_directory, st.session_state.output_path, project, curated_only=True, strategy=export_strategy, verify=verify_exports)
+        display_export_results(export_results, os.path.join(st.session_state.output_path, project))
+
+    # Export the project as a single archive, written sequentially instead of as thousands of small files
+    with st.expander("Export Project Archive"):
+        archive_format = st.selectbox("Archive Format", ARCHIVE_FORMATS, key=f"archive_format_{project}")
+        archive_curated_only = st.checkbox("Curated samples only", key=f"archive_curated_only_{project}")
+        if st.button("Export Archive"):
+            archive_path, export_results = export_archive(sample_folders, st.session_state[project]["curated_solutions"], sample_directory, st.session_state.output_path, project, archive_format, archive_curated_only)
+            display_export_results(export_results, archive_path)
     
     st.subheader(f"{project} Curation Status Overview")
 
@@ -164,6 +211,7 @@ def display():
                 # Column 5: Clear Button
                 with cols[4]:
                     if st.button("Remove Curation", key=f"clear_{sample}_{users[i]}"):
+                        record_curation(st.session_state.backend, project, "remove", sample, users[i])
                         st.session_state[project]["curated_solutions"][sample].pop(users[i])
                         st.rerun()
 
@@ -173,9 +221,10 @@ def display():
                         st.write("Curated Solution Hidden")
                     else:
                         if st.button(f"Export Curated Solution ({formatted_solution_name})", key=f"export_{sample}_{users[i]}"):
-                            st.write(f"Exported Curated Solution ({formatted_solution_name}) for {sample}")
-
-                            export(sample, sample_directory, st.session_state.output_path, st.session_state.selected_project, solutions[i][-11:-4])#TODO fix to remove sample
+                            file_strategies = export(sample, sample_directory, st.session_state.output_path, st.session_state.selected_project, solutions[i][-11:-4], export_strategy)#TODO fix to remove sample
+                            st.write(f"Exported Curated Solution ({formatted_solution_name}) for {sample} ({count_export_strategies(file_strategies)})")
+                            if verify_exports:
+                                display_verification(verify_export(sample, sample_directory, st.session_state.output_path, st.session_state.selected_project, solutions[i][-11:-4]))
                 
         else:
             # Create a row
@@ -192,9 +241,10 @@ def display():
             # Column 6: Export Button for default export
             with cols[5]: 
                 if st.button(f"Export Default Solution", key=f"export_{sample}"):
-                    st.write(f"Exported default solution for {sample}")
-
-                    export(sample, sample_directory, st.session_state.output_path, st.session_state.selected_project)
+                    file_strategies = export(sample, sample_directory, st.session_state.output_path, st.session_state.selected_project, strategy=export_strategy)
+                    st.write(f"Exported default solution for {sample} ({count_export_strategies(file_strategies)})")
+                    if verify_exports:
+                        display_verification(verify_export(sample, sample_directory, st.session_state.output_path, st.session_state.selected_project))
             
         # Add a divider to separate rows
         st.divider()
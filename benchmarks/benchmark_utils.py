@@ -0,0 +1,336 @@
+"""
+benchmark_utils.py
+Ha Lab, Fred Hutchinson Cancer Research Center
+
+This script measures the helper functions in app/src/utils.py that bound how fast the app responds on large
+projects: listing and indexing samples, finding the default solution, reading params files, writing the summary,
+exporting solutions and rendering PDFs. Each benchmark reports its throughput and latency percentiles.
+
+"Cold" benchmarks clear ichorCurate's own caches first (the operating system's page cache stays warm), while
+"warm" benchmarks repeat the operation with those caches filled, which is what most reruns of a page see.
+
+Usage (from the repository root):
+    python benchmarks/benchmark_utils.py --samples 1000
+    python benchmarks/benchmark_utils.py --data /tmp/ichorcna_fixture --only export render --json results.json
+    python benchmarks/benchmark_utils.py --samples 50 --only export --check
+"""
+
+# Import packages
+import argparse
+import json
+import os
+import re
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+APP_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "app")
+WORK_DIRECTORY = tempfile.mkdtemp(prefix="ichorCurate_benchmark_")
+
+# Keep the render cache of the benchmark away from the one used by the app
+os.environ["ICHORCURATE_RENDER_CACHE_DIR"] = os.path.join(WORK_DIRECTORY, "render_cache")
+sys.path.insert(0, APP_DIRECTORY)
+
+# Import user modules
+import src.utils as utils
+import generate_fixtures
+
+# Function to clear the in-process caches of utils, so the next call does all of its work again
+def clear_caches():
+    utils._sample_folders_cache.clear()
+    utils._sample_indexes.clear()
+    utils._params_file_cache.clear()
+    utils._params_tables.clear()
+    utils._project_stats_cache.clear()
+    clear_render_memory_cache()
+
+# Function to clear the in-memory tier of the render cache, leaving the on-disk tier
+def clear_render_memory_cache():
+    with utils._render_cache_lock:
+        utils._render_memory_cache.clear()
+        utils._render_memory_bytes = 0
+
+# Function to time a call once per item, returning the latency of each call in seconds
+def time_calls(function, items):
+    latencies = []
+    for item in items:
+        start = time.perf_counter()
+        function(item)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+# Function to get a percentile of a list of latencies (nearest rank)
+def percentile(latencies, q):
+    ordered = sorted(latencies)
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))]
+
+# Function to list the genome-wide PDFs of every sample
+def list_genome_wide_pdfs(data_path, samples):
+    genome_wide_pdfs = {}
+    for sample in samples:
+        pdf_files = sorted(f for f in os.listdir(os.path.join(data_path, sample)) if "genomeWide_n" in f and f.endswith(".pdf"))
+        genome_wide_pdfs[sample] = pdf_files
+    return genome_wide_pdfs
+
+# Function to curate one solution of every sample, as if a curator had gone through the whole project
+def make_curations(genome_wide_pdfs):
+    return {
+        sample: {"benchmark": {"solution_pdf": pdf_files[len(pdf_files) // 2], "timestamp": "2025-01-01 00:00:00"}}
+        for sample, pdf_files in genome_wide_pdfs.items() if pdf_files
+    }
+
+#############################
+### Benchmark Definitions ###
+#############################
+# Each benchmark takes the context and returns a list of per-operation latencies in seconds
+
+def bench_get_folders_cold(context):
+    def run(_):
+        clear_caches()
+        utils.get_folders(context["data_path"])
+    return time_calls(run, range(context["repeat"]))
+
+def bench_get_folders_warm(context):
+    utils.get_folders(context["data_path"])
+    return time_calls(lambda _: utils.get_folders(context["data_path"]), range(context["repeat"]))
+
+def bench_load_sample_index_cold(context):
+    def run(_):
+        clear_caches()
+        utils.load_sample_index(context["data_path"])
+    return time_calls(run, range(context["repeat"]))
+
+def bench_promote_default_pdf_cold(context):
+    clear_caches()
+    utils.load_sample_index(context["data_path"])
+    return time_calls(lambda sample: utils.promote_default_pdf(os.path.join(context["data_path"], sample), list(context["genome_wide_pdfs"][sample])), context["samples"])
+
+def bench_promote_default_pdf_warm(context):
+    for sample in context["samples"]:
+        utils.promote_default_pdf(os.path.join(context["data_path"], sample), list(context["genome_wide_pdfs"][sample]))
+    return time_calls(lambda sample: utils.promote_default_pdf(os.path.join(context["data_path"], sample), list(context["genome_wide_pdfs"][sample])), context["samples"])
+
+def bench_get_tfx_and_ploidy_cold(context):
+    clear_caches()
+    matches = {sample: re.search(r"n([\d.]+)-p(\d+)\.pdf$", curation["benchmark"]["solution_pdf"]) for sample, curation in context["curated_solutions"].items()}
+    return time_calls(lambda sample: utils.get_tfx_and_ploidy(sample, context["data_path"], matches[sample]), list(matches))
+
+def bench_load_params_table_cold(context):
+    def run(_):
+        clear_caches()
+        utils.load_params_table(context["data_path"])
+    return time_calls(run, range(context["repeat"]))
+
+def bench_load_params_store_cold(context):
+    # Building the store from scratch, parsing every params file
+    store_directory = os.path.join(WORK_DIRECTORY, "params_store")
+    def run(_):
+        clear_caches()
+        utils._params_stores.clear()
+        shutil.rmtree(store_directory, ignore_errors=True)
+        utils.load_params_store(context["data_path"], store_directory)
+    return time_calls(run, range(context["repeat"]))
+
+def bench_load_params_store_unchanged(context):
+    # Refreshing the store from its Parquet file when no params file changed, as a new app process would
+    store_directory = os.path.join(WORK_DIRECTORY, "params_store")
+    utils.load_params_store(context["data_path"], store_directory)
+    def run(_):
+        clear_caches()
+        utils._params_stores.clear()
+        utils.load_params_store(context["data_path"], store_directory)
+    return time_calls(run, range(context["repeat"]))
+
+def bench_rank_solutions(context):
+    # Ranking the whole project from an already built params table
+    params_table = utils.load_params_table(context["data_path"])
+    return time_calls(lambda _: utils.rank_solutions(params_table, tuple(utils.RANKING_CRITERIA)), range(context["repeat"]))
+
+def bench_populate_summary_cold(context):
+    def run(_):
+        clear_caches()
+        utils.populate_summary(context["samples"], context["data_path"], context["curated_solutions"])
+    return time_calls(run, range(context["repeat"]))
+
+def bench_populate_summary_warm(context):
+    utils.populate_summary(context["samples"], context["data_path"], context["curated_solutions"])
+    return time_calls(lambda _: utils.populate_summary(context["samples"], context["data_path"], context["curated_solutions"]), range(context["repeat"]))
+
+def bench_export_copy(context):
+    output_path = os.path.join(WORK_DIRECTORY, "export_copy")
+    shutil.rmtree(output_path, ignore_errors=True)
+    utils.generate_output_folders(output_path, "benchmark")
+    return time_calls(lambda sample: utils.export(sample, context["data_path"], output_path, "benchmark", "optimal", "copy"), context["export_samples"])
+
+def bench_export_unchanged(context):
+    # Re-exporting an up-to-date output only compares it with the export manifests
+    output_path = os.path.join(WORK_DIRECTORY, "export_copy")
+    utils.generate_output_folders(output_path, "benchmark")
+    for sample in context["export_samples"]:
+        utils.export(sample, context["data_path"], output_path, "benchmark", "optimal", "copy")
+    return time_calls(lambda sample: utils.export(sample, context["data_path"], output_path, "benchmark", "optimal", "copy"), context["export_samples"])
+
+# Function to export every sample with verification, returning the solution each sample is re-exported with next
+def export_verified(context, output_path):
+    shutil.rmtree(output_path, ignore_errors=True)
+    utils.generate_output_folders(output_path, "benchmark")
+    solutions = {}
+    for sample in context["export_samples"]:
+        utils.export(sample, context["data_path"], output_path, "benchmark", "optimal", "copy")
+        utils.verify_export(sample, context["data_path"], output_path, "benchmark")
+        solutions[sample] = re.search(r"(n[\d.]+-p\d+)\.pdf$", context["genome_wide_pdfs"][sample][-1]).group(1)
+    return solutions
+
+def bench_export_verified_then_changed(context):
+    # Re-exporting another solution without verification after a verified export, which also drops the checksums
+    output_path = os.path.join(WORK_DIRECTORY, "export_verified")
+    solutions = export_verified(context, output_path)
+    return time_calls(lambda sample: utils.export(sample, context["data_path"], output_path, "benchmark", solutions[sample], "copy"), context["export_samples"])
+
+def bench_render_cold(context):
+    shutil.rmtree(utils.RENDER_CACHE_DIR, ignore_errors=True)
+    utils._render_disk_bytes = None
+    clear_caches()
+    return time_calls(utils.get_pdf_first_page_image, context["render_pdfs"])
+
+def bench_render_disk_hit(context):
+    for pdf_path in context["render_pdfs"]:
+        utils.get_pdf_first_page_image(pdf_path)
+    clear_render_memory_cache()
+    return time_calls(utils.get_pdf_first_page_image, context["render_pdfs"])
+
+def bench_render_memory_hit(context):
+    for pdf_path in context["render_pdfs"]:
+        utils.get_pdf_first_page_image(pdf_path)
+    return time_calls(utils.get_pdf_first_page_image, context["render_pdfs"])
+
+def bench_render_batch_cold(context):
+    # One call rendering every PDF on the worker processes, reported per PDF
+    shutil.rmtree(utils.RENDER_CACHE_DIR, ignore_errors=True)
+    utils._render_disk_bytes = None
+    clear_caches()
+    start = time.perf_counter()
+    utils.get_pdf_first_page_images(context["render_pdfs"])
+    return [(time.perf_counter() - start) / len(context["render_pdfs"])] * len(context["render_pdfs"])
+
+# Benchmarks in the order they run, grouped so "--only" can select them by any part of their name
+BENCHMARKS = [
+    ("get_folders (cold)", bench_get_folders_cold),
+    ("get_folders (warm)", bench_get_folders_warm),
+    ("load_sample_index (cold)", bench_load_sample_index_cold),
+    ("promote_default_pdf (cold)", bench_promote_default_pdf_cold),
+    ("promote_default_pdf (warm)", bench_promote_default_pdf_warm),
+    ("get_tfx_and_ploidy (cold)", bench_get_tfx_and_ploidy_cold),
+    ("load_params_table (cold)", bench_load_params_table_cold),
+    ("load_params_store (cold)", bench_load_params_store_cold),
+    ("load_params_store (unchanged)", bench_load_params_store_unchanged),
+    ("rank_solutions", bench_rank_solutions),
+    ("populate_summary (cold)", bench_populate_summary_cold),
+    ("populate_summary (warm)", bench_populate_summary_warm),
+    ("export copy", bench_export_copy),
+    ("export unchanged", bench_export_unchanged),
+    ("export verified then changed", bench_export_verified_then_changed),
+    ("render get_pdf_first_page_image (cold)", bench_render_cold),
+    ("render get_pdf_first_page_image (disk hit)", bench_render_disk_hit),
+    ("render get_pdf_first_page_image (memory hit)", bench_render_memory_hit),
+    ("render get_pdf_first_page_images (cold batch)", bench_render_batch_cold),
+]
+
+# Correctness checks, run with "--check" after the benchmarks. Each returns a list of problems, empty if it passed.
+def check_export_drops_stale_checksums(context):
+    # A re-export of another solution must not leave a checksum manifest listing files that are no longer exported
+    output_path = os.path.join(WORK_DIRECTORY, "check_export_verified")
+    solutions = export_verified(context, output_path)
+    problems = []
+    for sample in context["export_samples"]:
+        utils.export(sample, context["data_path"], output_path, "benchmark", solutions[sample], "copy")
+        checksum_path = os.path.join(output_path, "benchmark", sample, utils.CHECKSUM_MANIFEST_NAME)
+        if os.path.exists(checksum_path):
+            with open(checksum_path) as f:
+                listed_files = [line.rstrip("\n").split("  ", 1)[1] for line in f]
+            missing_files = [listed_file for listed_file in listed_files if not os.path.exists(os.path.join(output_path, "benchmark", sample, listed_file))]
+            if missing_files:
+                problems.append(f"{checksum_path} lists {len(missing_files)} files that are no longer exported")
+    return problems
+
+CHECKS = [
+    ("export drops stale checksums", check_export_drops_stale_checksums),
+]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the ichorCurate helper functions on a synthetic or existing ichorCNA project.")
+    parser.add_argument("--data", help="existing ichorCNA data directory to benchmark (default: generate a synthetic one)")
+    parser.add_argument("--samples", type=int, default=200, help="number of samples of the generated project (default: 200)")
+    parser.add_argument("--solutions", type=int, default=6, help="number of solutions per sample of the generated project (default: 6)")
+    parser.add_argument("--repeat", type=int, default=5, help="number of repetitions of whole-project benchmarks (default: 5)")
+    parser.add_argument("--export-samples", type=int, default=50, help="number of samples exported by the export benchmarks (default: 50)")
+    parser.add_argument("--render-pdfs", type=int, default=50, help="number of genome-wide PDFs rendered by the render benchmarks (default: 50)")
+    parser.add_argument("--only", nargs="*", help="only run the benchmarks whose name contains one of these words")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    parser.add_argument("--check", action="store_true", help="also run the correctness checks, exiting with an error if any fails")
+    args = parser.parse_args(argv)
+
+    try:
+        # Generate a project unless one was given
+        data_path = args.data
+        if not data_path:
+            data_path = os.path.join(WORK_DIRECTORY, "data")
+            generate_fixtures.main([data_path, "--samples", str(args.samples), "--solutions", str(args.solutions), "--bins", "0", "--link"])
+        data_path = utils.format_filepath(os.path.abspath(data_path))
+
+        samples = utils.get_folders(data_path)
+        genome_wide_pdfs = list_genome_wide_pdfs(data_path, samples)
+        context = {
+            "data_path": data_path,
+            "samples": samples,
+            "genome_wide_pdfs": genome_wide_pdfs,
+            "curated_solutions": make_curations(genome_wide_pdfs),
+            "repeat": args.repeat,
+            "export_samples": samples[:args.export_samples],
+            "render_pdfs": [os.path.join(data_path, sample, pdf_file) for sample in samples for pdf_file in genome_wide_pdfs[sample]][:args.render_pdfs],
+        }
+        print(f"Benchmarking {len(samples)} samples in {data_path}")
+
+        results = []
+        print(f"{'benchmark':<48}{'ops':>7}{'ops/s':>11}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for name, benchmark in BENCHMARKS:
+            if args.only and not any(word in name for word in args.only):
+                continue
+            latencies = benchmark(context)
+            total = sum(latencies)
+            result = {
+                "benchmark": name,
+                "ops": len(latencies),
+                "total_s": total,
+                "ops_per_s": len(latencies) / total if total else float("inf"),
+                "mean_ms": statistics.mean(latencies) * 1000,
+                "p50_ms": percentile(latencies, 50) * 1000,
+                "p95_ms": percentile(latencies, 95) * 1000,
+                "p99_ms": percentile(latencies, 99) * 1000,
+            }
+            results.append(result)
+            print(f"{name:<48}{result['ops']:>7}{result['ops_per_s']:>11.1f}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}")
+
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump({"data_path": data_path, "samples": len(samples), "results": results}, f, indent=2)
+
+        # Run the correctness checks apart from the timed benchmarks
+        failed_checks = 0
+        if args.check:
+            for name, check in CHECKS:
+                if args.only and not any(word in name for word in args.only):
+                    continue
+                problems = check(context)
+                print(f"check {name}: {'FAILED' if problems else 'ok'}")
+                for problem in problems:
+                    print(f"    {problem}")
+                failed_checks += bool(problems)
+        return 1 if failed_checks else 0
+    finally:
+        shutil.rmtree(WORK_DIRECTORY, ignore_errors=True)
+
+if __name__ == "__main__":
+    sys.exit(main())
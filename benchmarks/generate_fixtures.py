@@ -0,0 +1,144 @@
+"""
+generate_fixtures.py
+Ha Lab, Fred Hutchinson Cancer Research Center
+
+This script writes a synthetic ichorCNA data directory, laid out like the output ichorCurate reads, for testing
+and benchmarking at realistic scale. Every sample gets one folder per solution (n = normal fraction, p = ploidy)
+holding a params.txt, the bin-level and segment tables and one plot PDF per chromosome, a genome-wide PDF per
+solution, and a copy of the most likely solution in an "optimal" folder. The PDFs are real, small PDFs with
+a configurable number of plotted points, so rendering them costs about as much as rendering ichorCNA's plots.
+
+Usage (from the repository root):
+    python benchmarks/generate_fixtures.py /tmp/ichorcna_fixture --samples 10000 --solutions 6
+    python benchmarks/generate_fixtures.py /tmp/ichorcna_fixture --samples 100 --points 5000 --link
+"""
+
+# Import packages
+import argparse
+import os
+import random
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+import fitz  # PyMuPDF
+
+# The normal fraction and ploidy values ichorCNA explores by default, in the order solutions are picked
+NORMAL_FRACTIONS = ["0.5", "0.6", "0.7", "0.8", "0.9", "0.95", "0.99"]
+PLOIDIES = ["2", "3", "4"]
+CHROMOSOMES = [str(c) for c in range(1, 23)] + ["X"]
+
+# Page sizes (in points) of ichorCNA's genome-wide and per-chromosome plots
+GENOME_WIDE_PAGE = (1440, 432)
+CHROMOSOME_PAGE = (576, 432)
+
+# Function to write a PDF with a scatter plot of random points, standing in for an ichorCNA copy-number plot
+def make_plot_pdf(path, title, page_size, points, rng):
+    pdf = fitz.open()
+    page = pdf.new_page(width=page_size[0], height=page_size[1])
+    page.insert_text((40, 30), title, fontsize=14)
+    shape = page.new_shape()
+    for i in range(points):
+        x = 40 + (page_size[0] - 60) * i / max(1, points - 1)
+        y = page_size[1] / 2 + rng.gauss(0, page_size[1] / 10)
+        shape.draw_circle((x, min(page_size[1] - 10, max(40, y))), 1)
+    shape.finish(color=(0.2, 0.2, 0.8), fill=(0.2, 0.2, 0.8))
+    shape.commit()
+    pdf.save(path, garbage=3, deflate=True)
+    pdf.close()
+
+# Function to write the params.txt of one solution
+def make_params_file(path, sample, tumor_fraction, ploidy, loglik):
+    with open(path, "w") as f:
+        f.write("Sample\tTumor Fraction\tPloidy\tSubclone Fraction\tFraction Genome Subclonal\tFraction CNA Subclonal\tGender\n")
+        f.write(f"{sample}\t{tumor_fraction:.4f}\t{ploidy:.3f}\t0\t0\t0\tmale\n")
+        f.write("Gender:\tmale\n")
+        f.write(f"Tumor Fraction:\t{tumor_fraction:.4f}\n")
+        f.write(f"Ploidy:\t{ploidy:.3f}\n")
+        f.write("Subclone Fraction:\tNA\n")
+        f.write("Gamma Rate Init:\t1000\n")
+        f.write(f"GC-Map correction MAD:\t{0.05 + tumor_fraction / 10:.4f}\n")
+        f.write(f"Loglik:\t{loglik:.2f}\n")
+
+# Function to write the bin-level (.cna.seg) and segment (.seg.txt) tables of one solution
+def make_cna_tables(solution_folder, sample, bins_per_chromosome, rng):
+    with open(os.path.join(solution_folder, f"{sample}.cna.seg"), "w") as cna_file, open(os.path.join(solution_folder, f"{sample}.seg.txt"), "w") as seg_file:
+        cna_file.write(f"chr\tstart\tend\t{sample}.copy.number\t{sample}.event\t{sample}.logR\t{sample}.subclone.status\t{sample}.Corrected_Copy_Number\t{sample}.Corrected_Call\t{sample}.logR_Copy_Number\n")
+        seg_file.write("ID\tchrom\tstart\tend\tnum.mark\tseg.median.logR\tcopy.number\tcall\tsubclone.status\tlogR_Copy_Number\tCorrected_Copy_Number\tCorrected_Call\n")
+        for chromosome in CHROMOSOMES:
+            copy_number = rng.choice([1, 2, 2, 2, 3, 4])
+            call = {1: "HETD", 2: "NEUT", 3: "GAIN", 4: "AMP"}[copy_number]
+            median_log_r = 0.0
+            for i in range(bins_per_chromosome):
+                start = i * 1000000 + 1
+                log_r = (copy_number - 2) * 0.15 + rng.gauss(0, 0.1)
+                median_log_r += log_r / bins_per_chromosome
+                cna_file.write(f"{chromosome}\t{start}\t{start + 999999}\t{copy_number}\t{call}\t{log_r:.4f}\t0\t{copy_number}\t{call}\t{2 * 2 ** log_r:.4f}\n")
+            seg_file.write(f"{sample}\t{chromosome}\t1\t{bins_per_chromosome * 1000000}\t{bins_per_chromosome}\t{median_log_r:.4f}\t{copy_number}\t{call}\t0\t{2 * 2 ** median_log_r:.4f}\t{copy_number}\t{call}\n")
+
+# Function to place a copy of a template PDF, hardlinked to save space and time if requested
+def place_pdf(template_path, path, link):
+    if os.path.lexists(path):
+        os.remove(path)
+    if link:
+        os.link(template_path, path)
+    else:
+        shutil.copyfile(template_path, path)
+
+# Function to write one sample folder
+def make_sample(data_path, sample, solutions, templates, args):
+    rng = random.Random(f"{args.seed}-{sample}")
+    sample_folder = os.path.join(data_path, sample)
+    os.makedirs(sample_folder, exist_ok=True)
+
+    logliks = {solution: -rng.uniform(1000, 2000) for solution in solutions}
+    optimal = max(logliks, key=logliks.get)
+
+    for n_value, p_value in solutions:
+        place_pdf(templates["genome_wide"], os.path.join(sample_folder, f"{sample}_genomeWide_n{n_value}-p{p_value}.pdf"), args.link)
+
+        folder_names = [f"{sample}_n{n_value}_p{p_value}"]
+        if (n_value, p_value) == optimal:
+            folder_names.append(f"{sample}_optimal_n{n_value}_p{p_value}")
+        for folder_name in folder_names:
+            solution_folder = os.path.join(sample_folder, folder_name)
+            os.makedirs(os.path.join(solution_folder, sample), exist_ok=True)
+            tumor_fraction = max(0.0, 1 - float(n_value) + rng.gauss(0, 0.01))
+            make_params_file(os.path.join(solution_folder, f"{sample}.params.txt"), sample, tumor_fraction, float(p_value) + rng.gauss(0, 0.05), logliks[(n_value, p_value)])
+            if args.bins:
+                make_cna_tables(solution_folder, sample, args.bins, rng)
+            for chromosome in CHROMOSOMES[:args.chromosomes]:
+                place_pdf(templates["chromosome"], os.path.join(solution_folder, sample, f"{sample}_CNA_chrchr{chromosome}.pdf"), args.link)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic ichorCNA data directory.")
+    parser.add_argument("data_path", help="folder to write the samples to (created if needed)")
+    parser.add_argument("--samples", type=int, default=100, help="number of samples (default: 100)")
+    parser.add_argument("--solutions", type=int, default=6, help=f"number of solutions per sample, up to {len(NORMAL_FRACTIONS) * len(PLOIDIES)} (default: 6)")
+    parser.add_argument("--chromosomes", type=int, default=len(CHROMOSOMES), help=f"number of chromosome PDFs per solution, up to {len(CHROMOSOMES)} (default: {len(CHROMOSOMES)})")
+    parser.add_argument("--points", type=int, default=2000, help="number of plotted points per PDF, which sets the rendering cost (default: 2000)")
+    parser.add_argument("--bins", type=int, default=50, help="number of bins per chromosome in the .cna.seg tables, 0 to skip the tables (default: 50)")
+    parser.add_argument("--link", action="store_true", help="hardlink every PDF to a template instead of copying it")
+    parser.add_argument("--workers", type=int, default=16, help="number of samples written concurrently (default: 16)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed, so fixtures are reproducible (default: 0)")
+    args = parser.parse_args(argv)
+
+    solutions = [(n_value, p_value) for p_value in PLOIDIES for n_value in NORMAL_FRACTIONS][:args.solutions]
+    os.makedirs(args.data_path, exist_ok=True)
+
+    # Every PDF is a copy of one of two templates, so generating a large project is bounded by the filesystem, not by PyMuPDF
+    template_folder = os.path.join(args.data_path, os.pardir, f".{os.path.basename(os.path.normpath(args.data_path))}_templates")
+    os.makedirs(template_folder, exist_ok=True)
+    rng = random.Random(args.seed)
+    templates = {"genome_wide": os.path.join(template_folder, "genome_wide.pdf"), "chromosome": os.path.join(template_folder, "chromosome.pdf")}
+    make_plot_pdf(templates["genome_wide"], "Genome-wide copy number", GENOME_WIDE_PAGE, args.points, rng)
+    make_plot_pdf(templates["chromosome"], "Chromosome copy number", CHROMOSOME_PAGE, max(1, args.points // 10), rng)
+
+    samples = [f"SAMPLE{i:06d}" for i in range(args.samples)]
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        for _ in executor.map(lambda sample: make_sample(args.data_path, sample, solutions, templates, args), samples):
+            pass
+
+    print(f"Wrote {len(samples)} samples with {len(solutions)} solutions each to {args.data_path}")
+
+if __name__ == "__main__":
+    main()
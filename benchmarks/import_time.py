@@ -0,0 +1,97 @@
+"""
+import_time.py
+Ha Lab, Fred Hutchinson Cancer Research Center
+
+This script reports how long the ichorCurate modules take to import, which bounds how quickly a fresh container
+or app process can show its first page. Each module is imported in a new interpreter with `python -X importtime`,
+several times, and the median cumulative import time is reported together with the slowest direct imports and
+whether the heavy optional dependencies (PyMuPDF, pandas, PIL, ...) were loaded.
+
+Usage (from the repository root):
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --repeat 10 --top 5 --json import_time.json
+"""
+
+# Import packages
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+APP_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "app")
+
+# Modules in the order a user reaches them
+MODULES = [
+    "src.utils",
+    "subpages.login",
+    "subpages.backend_selection",
+    "subpages.projects_overview",
+    "subpages.tracker_dashboard",
+    "subpages.curation",
+    "ichorcurate",
+]
+
+# Dependencies that should only be loaded by the pages that need them
+HEAVY_MODULES = ["fitz", "pandas", "PIL.Image", "numpy", "pyarrow", "plotly"]
+
+# Function to import a module in a fresh interpreter, returning {imported module: (self us, cumulative us, depth)}
+def measure_import(module):
+    check_heavy = f"import sys; import {module}; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", check_heavy], cwd=APP_DIRECTORY, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr.strip().splitlines()[-1]}")
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        timings[name.strip()] = (int(self_us), int(cumulative_us), depth)
+    heavy_loaded = [m for m in result.stdout.strip().split(",") if m]
+    return timings, heavy_loaded
+
+# Function to report the median import time of a module over several runs
+def benchmark_module(module, repeat, top):
+    runs = [measure_import(module) for _ in range(repeat)]
+    totals = [timings[module][1] for timings, _ in runs]
+    median_run = sorted(runs, key=lambda run: run[0][module][1])[len(runs) // 2]
+
+    # The slowest imports made directly by the module
+    direct_imports = [(name, timing[1]) for name, timing in median_run[0].items() if timing[2] == 1]
+    direct_imports.sort(key=lambda item: item[1], reverse=True)
+
+    return {
+        "module": module,
+        "median_ms": statistics.median(totals) / 1000,
+        "min_ms": min(totals) / 1000,
+        "max_ms": max(totals) / 1000,
+        "slowest_imports": [{"module": name, "ms": us / 1000} for name, us in direct_imports[:top]],
+        "heavy_modules_loaded": median_run[1],
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report the import time of the ichorCurate modules.")
+    parser.add_argument("--repeat", type=int, default=5, help="number of fresh interpreters per module (default: 5)")
+    parser.add_argument("--top", type=int, default=3, help="number of slowest imports listed per module (default: 3)")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    parser.add_argument("modules", nargs="*", default=MODULES, help="modules to measure, relative to app/ (default: all pages)")
+    args = parser.parse_args(argv)
+
+    results = []
+    print(f"{'module':<30}{'median ms':>12}{'min ms':>10}{'max ms':>10}  heavy modules loaded")
+    for module in args.modules:
+        result = benchmark_module(module, args.repeat, args.top)
+        results.append(result)
+        print(f"{module:<30}{result['median_ms']:>12.1f}{result['min_ms']:>10.1f}{result['max_ms']:>10.1f}  {', '.join(result['heavy_modules_loaded']) or '-'}")
+        for slow_import in result["slowest_imports"]:
+            print(f"    {slow_import['module']:<40}{slow_import['ms']:>10.1f} ms")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"python": sys.version, "repeat": args.repeat, "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()